@@ -0,0 +1,113 @@
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import event, select
+
+from database import async_engine, engine, Session, session
+from models import Schedule, User
+from utils import LoopLagMonitor
+
+__all__ = []
+
+
+def _build_query(user: User, weekday: int):
+    return select(Schedule).filter_by(
+        group_id=user.group_id,
+        day_of_week=weekday,
+    ).order_by(Schedule.lesson_number, Schedule.id)
+
+
+async def _sync_update(user: User, weekday: int) -> None:
+    with Session() as db_session:
+        db_session.get(User, user.id)
+        db_session.execute(_build_query(user, weekday)).scalars().all()
+
+
+async def _async_update(user: User, weekday: int) -> None:
+    try:
+        await session.get(User, user.id)
+        (await session.execute(_build_query(user, weekday))).scalars().all()
+    finally:
+        await session.remove()
+
+
+async def _ping(latencies: list[float], interval: float, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0)
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+
+async def _measure(handler, users: list[User], concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    lag_monitor = LoopLagMonitor(interval=0.01)
+    latencies = []
+    stop = asyncio.Event()
+
+    async def process(user: User) -> None:
+        async with semaphore:
+            await handler(user, random.randrange(6))
+
+    lag_monitor.start()
+    ping_task = asyncio.create_task(_ping(latencies, 0.005, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(process(user) for user in users))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ping_task
+    lag_monitor.stop()
+
+    latencies.sort()
+    return {
+        "elapsed": elapsed,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0,
+        "max_lag": lag_monitor.max_lag,
+    }
+
+
+def _add_delay(delay: float) -> None:
+    def slow_disk(*_args) -> None:
+        time.sleep(delay)
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", slow_disk)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Задержка цикла событий при sync и async запросах к БД",
+    )
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--delay", type=float, default=2.0, help="мс на запрос")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with Session(expire_on_commit=False) as db_session:
+        users = db_session.execute(
+            select(User).where(User.group_id.is_not(None)),
+        ).scalars().all()
+    if not users:
+        print("В базе нет студентов.")  # noqa: T201
+        return
+    random.seed(args.seed)
+    users = random.choices(users, k=args.updates)
+    _add_delay(args.delay / 1000)
+
+    for name, handler in (("sync", _sync_update), ("async", _async_update)):
+        result = asyncio.run(_measure(handler, users, args.concurrency))
+        print(  # noqa: T201
+            f"{name:>5}: {args.updates} обновлений за {result['elapsed']:.2f} с, "
+            f"отклик цикла p50 {result['p50'] * 1e3:.2f} мс, "
+            f"p95 {result['p95'] * 1e3:.2f} мс, "
+            f"макс. задержка {result['max_lag'] * 1e3:.0f} мс",
+        )
+
+
+if __name__ == "__main__":
+    main()
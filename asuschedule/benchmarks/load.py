@@ -0,0 +1,198 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import time
+from collections import defaultdict
+from io import BytesIO
+from pathlib import Path
+
+from telegram import Update
+from telegram.ext import Application
+
+from benchmarks.offline import (
+    build_offline_application,
+    OfflineRequest,
+    process_update,
+    UpdateFactory,
+)
+from benchmarks.synthetic import prepare_database, SyntheticConfig, write_schedule_xlsx
+from database import Session
+from schedules.catalog import get_group_catalog
+
+__all__ = []
+
+ADMIN_ID = 1_000_000
+BUTTONS = {
+    "today": "Расписание на сегодня",
+    "tomorrow": "Расписание на завтра",
+    "info": "Информация",
+}
+
+
+class LoadTest:
+    def __init__(self, application: Application, user_ids: list[int], args):
+        self.application = application
+        self.user_ids = user_ids
+        self.think = args.think
+        self.rng = random.Random(args.seed)
+        self.updates = UpdateFactory(application.bot)
+        self.timings = defaultdict(list)
+        self.errors = 0
+
+    async def _send(self, name: str, update: Update) -> None:
+        started = time.perf_counter()
+        await process_update(self.application, update)
+        self.timings[name].append(time.perf_counter() - started)
+        await asyncio.sleep(self.think)
+
+    async def _count_error(self, _update: object, _context) -> None:
+        self.errors += 1
+
+    async def button_flow(self, user_id: int) -> None:
+        name = self.rng.choice(list(BUTTONS))
+        await self._send(name, self.updates.text(user_id, BUTTONS[name]))
+
+    async def select_day_flow(self, user_id: int) -> None:
+        await self._send(
+            "select_day.start", self.updates.text(user_id, "Выбрать день"),
+        )
+        data = f"scheduleDay_{self.rng.randrange(6)}_{self.rng.randrange(2)}"
+        await self._send("select_day.callback", self.updates.callback(user_id, data))
+
+    async def registration_flow(self, user_id: int) -> None:
+        group_id = self.rng.choice(list(get_group_catalog().groups))
+        await self._send("registration.start", self.updates.text(user_id, "/start"))
+        for step, data in (
+                ("faculty", f"regFac_{group_id}"),
+                ("course", f"regCourse_{group_id}"),
+                ("speciality", f"regSpec_{group_id}"),
+                ("subgroup", f"regSubgroup_{group_id}_{self.rng.choice([1, 2])}"),
+        ):
+            await self._send(
+                f"registration.{step}",
+                self.updates.callback(user_id, data),
+            )
+
+    async def document_flow(self, user_id: int) -> None:
+        await self._send("document", self.updates.document(user_id))
+
+    async def run(self, flows: int, rate: float, documents: int) -> float:
+        self.application.add_error_handler(self._count_error)
+        weighted_flows = [
+            (self.button_flow, 6),
+            (self.select_day_flow, 3),
+            (self.registration_flow, 1),
+        ]
+        document_at = {
+            flows * (index + 1) // (documents + 1) for index in range(documents)
+        }
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        tasks = []
+        for index in range(flows):
+            await asyncio.sleep(max(started + index / rate - loop.time(), 0))
+            if index in document_at:
+                tasks.append(asyncio.create_task(self.document_flow(ADMIN_ID)))
+            flow = self.rng.choices(
+                [flow for flow, _ in weighted_flows],
+                [weight for _, weight in weighted_flows],
+            )[0]
+            tasks.append(asyncio.create_task(flow(self.rng.choice(self.user_ids))))
+        await asyncio.gather(*tasks)
+        return loop.time() - started
+
+
+def _summary(timings: list[float]) -> dict:
+    timings = sorted(timings)
+    if len(timings) > 1:
+        percentiles = statistics.quantiles(timings, n=100, method="inclusive")
+    else:
+        percentiles = timings * 99
+    return {
+        "calls": len(timings),
+        "p50_ms": percentiles[49] * 1e3,
+        "p95_ms": percentiles[94] * 1e3,
+        "p99_ms": percentiles[98] * 1e3,
+        "max_ms": timings[-1] * 1e3,
+    }
+
+
+def _print_results(results: dict) -> None:
+    for name, result in results.items():
+        print(  # noqa: T201
+            f"{name:<24} p50 {result['p50_ms']:9.2f} мс, "
+            f"p95 {result['p95_ms']:9.2f} мс, "
+            f"p99 {result['p99_ms']:9.2f} мс, max {result['max_ms']:9.2f} мс, "
+            f"обновлений {result['calls']}",
+        )
+
+
+async def _run(config: SyntheticConfig, xlsx: bytes, args) -> dict:
+    request = OfflineRequest(args.api_latency / 1000, xlsx)
+    application = build_offline_application(request)
+    user_ids = [ADMIN_ID + user_id for user_id in range(1, config.users)]
+    load_test = LoadTest(application, user_ids, args)
+    await application.initialize()
+    try:
+        duration = await load_test.run(args.flows, args.rate, args.documents)
+    finally:
+        await application.shutdown()
+
+    results = {
+        name: _summary(timings) for name, timings in sorted(load_test.timings.items())
+    }
+    results["all"] = _summary([
+        timing for timings in load_test.timings.values() for timing in timings
+    ])
+    return {
+        "duration_s": duration,
+        "throughput": results["all"]["calls"] / duration,
+        "errors": load_test.errors,
+        "api_calls": dict(request.calls),
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Нагрузочный тест бота на синтетических обновлениях без сети",
+    )
+    parser.add_argument("--users", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--flows", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=200.0)
+    parser.add_argument("--documents", type=int, default=1)
+    parser.add_argument("--think", type=float, default=0.1)
+    parser.add_argument("--api-latency", type=float, default=20.0)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    config = SyntheticConfig(users=args.users, seed=args.seed)
+    xlsx = BytesIO()
+    write_schedule_xlsx(xlsx, config)
+    with Session(expire_on_commit=False) as db_session:
+        prepare_database(db_session, config, xlsx.getvalue(), ADMIN_ID)
+
+    report = asyncio.run(_run(config, xlsx.getvalue(), args))
+    _print_results(report["results"])
+    print(  # noqa: T201
+        f"Длительность {report['duration_s']:.1f} с, "
+        f"пропускная способность {report['throughput']:.1f} обновлений/с, "
+        f"ошибок {report['errors']}, вызовов API {sum(report['api_calls'].values())}",
+    )
+    if args.output:
+        args.output.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+
+from telegram import Bot, Update
+from telegram.ext import Application
+from telegram.request import BaseRequest
+
+from main import build_application
+
+__all__ = [
+    "build_offline_application",
+    "OfflineRequest",
+    "process_update",
+    "UpdateFactory",
+]
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "ASU Schedule", "username": "bot"}
+
+
+class OfflineRequest(BaseRequest):
+    def __init__(self, latency: float, document: bytes):
+        self.latency = latency
+        self.document = document
+        self.calls = Counter()
+        self._message_ids = itertools.count(1)
+
+    @property
+    def read_timeout(self) -> float | None:
+        return None
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def _get_result(self, endpoint: str, parameters: dict):
+        if endpoint == "getMe":
+            return BOT_USER
+        if endpoint in ("sendMessage", "editMessageText", "sendDocument"):
+            return {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": int(parameters["chat_id"]), "type": "private"},
+                "from": BOT_USER,
+                "text": parameters.get("text", ""),
+            }
+        if endpoint == "getFile":
+            return {
+                "file_id": parameters["file_id"],
+                "file_unique_id": parameters["file_id"],
+                "file_size": len(self.document),
+                "file_path": "documents/schedule.xlsx",
+            }
+        return True
+
+    async def do_request(
+            self, url: str, method: str, request_data=None, *_args, **_kwargs,
+    ):
+        await asyncio.sleep(self.latency)
+        if "/file/bot" in url:
+            return 200, self.document
+        endpoint = url.rsplit("/", 1)[-1]
+        self.calls[endpoint] += 1
+        parameters = request_data.parameters if request_data else {}
+        result = self._get_result(endpoint, parameters)
+        return 200, json.dumps({"ok": True, "result": result}).encode("utf-8")
+
+
+class UpdateFactory:
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self._update_ids = itertools.count(1)
+
+    def _get_user(self, user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+
+    def _get_message(self, user_id: int, **fields) -> dict:
+        return {
+            "message_id": next(self._update_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._get_user(user_id),
+            **fields,
+        }
+
+    def text(self, user_id: int, text: str) -> Update:
+        message = self._get_message(user_id, text=text)
+        if text.startswith("/"):
+            message["entities"] = [
+                {"type": "bot_command", "offset": 0, "length": len(text.split()[0])},
+            ]
+        return Update.de_json(
+            {"update_id": next(self._update_ids), "message": message},
+            self.bot,
+        )
+
+    def callback(self, user_id: int, data: str) -> Update:
+        update_id = next(self._update_ids)
+        return Update.de_json(
+            {
+                "update_id": update_id,
+                "callback_query": {
+                    "id": str(update_id),
+                    "from": self._get_user(user_id),
+                    "chat_instance": str(user_id),
+                    "data": data,
+                    "message": {
+                        **self._get_message(user_id, text="..."),
+                        "from": BOT_USER,
+                    },
+                },
+            },
+            self.bot,
+        )
+
+    def document(self, user_id: int) -> Update:
+        document = {
+            "file_id": "schedule",
+            "file_unique_id": "schedule",
+            "file_name": "schedule.xlsx",
+        }
+        return Update.de_json(
+            {
+                "update_id": next(self._update_ids),
+                "message": self._get_message(user_id, document=document),
+            },
+            self.bot,
+        )
+
+
+def build_offline_application(request: OfflineRequest) -> Application:
+    return build_application(
+        Application.builder().token("1:offline").request(request).get_updates_request(
+            OfflineRequest(request.latency, request.document),
+        ),
+    )
+
+
+async def process_update(application: Application, update: Update) -> None:
+    await application.update_processor.process_update(
+        update,
+        application.process_update(update),
+    )
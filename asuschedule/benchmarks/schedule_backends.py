@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import select
+
+from database import Session, session
+from models import User
+from schedules.index import get_schedule_index, load_schedule_index
+from schedules.schedules import query_schedules
+
+__all__ = []
+
+
+def _measure(func, calls: list[tuple]) -> list[float]:
+    timings = []
+    for args in calls:
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def _measure_async(func, calls: list[tuple]) -> list[float]:
+    timings = []
+    for args in calls:
+        started = time.perf_counter()
+        await func(*args)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def _query_all(calls: list[tuple]) -> list[list[int]]:
+    try:
+        return [[s.id for s in await query_schedules(*call)] for call in calls]
+    finally:
+        await session.remove()
+
+
+async def _measure_sql(calls: list[tuple]) -> list[float]:
+    try:
+        return await _measure_async(query_schedules, calls)
+    finally:
+        await session.remove()
+
+
+def _format(name: str, timings: list[float]) -> str:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    return (
+        f"{name:>6}: mean {statistics.mean(timings) * 1e6:8.1f} us, "
+        f"p95 {p95 * 1e6:8.1f} us, total {sum(timings):.3f} s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Сравнение SQL и in-memory индекса для get_schedules",
+    )
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with Session(expire_on_commit=False) as db_session:
+        users = db_session.execute(select(User)).scalars().all()
+    random.seed(args.seed)
+    users = random.sample(users, min(args.users, len(users)))
+    calls = [
+        (user, day, even_week)
+        for user in users
+        for day in range(7)
+        for even_week in (False, True)
+    ]
+    if not calls:
+        print("В базе нет пользователей.")  # noqa: T201
+        return
+
+    load_schedule_index()
+    index = get_schedule_index()
+    mismatches = sum(
+        sql_ids != [s.id for s in index.get_schedules(*call)]
+        for sql_ids, call in zip(asyncio.run(_query_all(calls)), calls)
+    )
+
+    print(f"Вызовов: {len(calls)}, расхождений: {mismatches}")  # noqa: T201
+    print(_format("sql", asyncio.run(_measure_sql(calls))))  # noqa: T201
+    print(_format("memory", _measure(index.get_schedules, calls)))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
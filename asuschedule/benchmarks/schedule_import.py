@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base
+from schedules.importer import import_schedules
+from utils import LoopLagMonitor
+
+__all__ = []
+
+
+def _import(session_factory: sessionmaker, data: bytes):
+    with session_factory(expire_on_commit=False) as import_session:
+        return import_schedules(import_session, BytesIO(data))
+
+
+async def _measure(session_factory: sessionmaker, data: bytes, threaded: bool):
+    lag_monitor = LoopLagMonitor()
+    lag_monitor.start()
+    await asyncio.sleep(0)
+    tracemalloc.start()
+    started = time.perf_counter()
+    if threaded:
+        report = await asyncio.to_thread(_import, session_factory, data)
+    else:
+        report = _import(session_factory, data)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await asyncio.sleep(lag_monitor.interval * 2)
+    lag_monitor.stop()
+    return report, elapsed, peak, lag_monitor.max_lag
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Замер загрузки xlsx: память и задержка цикла событий",
+    )
+    parser.add_argument("path", type=Path)
+    args = parser.parse_args()
+    data = args.path.read_bytes()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/import.db")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        for threaded in (False, True):
+            report, elapsed, peak, max_lag = asyncio.run(
+                _measure(session_factory, data, threaded),
+            )
+            print(  # noqa: T201
+                f"{'thread' if threaded else 'inline':>6}: "
+                f"{report.rows} строк за {elapsed:.2f} с, "
+                f"пик памяти {peak / 2 ** 20:.1f} МиБ, "
+                f"макс. задержка цикла {max_lag * 1000:.0f} мс",
+            )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
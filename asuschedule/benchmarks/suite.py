@@ -0,0 +1,281 @@
+import argparse
+import asyncio
+import datetime
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from dataclasses import asdict
+from io import BytesIO
+from pathlib import Path
+from types import SimpleNamespace
+
+from sqlalchemy import select
+
+from benchmarks.synthetic import prepare_database, SyntheticConfig, write_schedule_xlsx
+from consts import LESSON_TIMES, TIMEZONE
+from database import Session, session
+from handlers import handle_file
+from models import User
+from schedules.broadcast import prepare_daily_broadcast
+from schedules.index import get_schedule_index, load_schedule_index
+from schedules.notify_plan import notification_plan
+from schedules.schedules import query_schedules
+from schedules.schedules_text import (
+    get_cached_schedule_text,
+    get_schedule_text_by_day,
+    schedule_text_cache,
+)
+from sender import SendPipeline
+
+__all__ = []
+
+ADMIN_ID = 1_000_000
+BENCHMARK_DATE = datetime.datetime(2024, 9, 2, 7, 0, tzinfo=TIMEZONE)
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = 0
+
+    async def send_message(self, chat_id: int, text: str, parse_mode: str = None):
+        self.sent += 1
+
+
+class FakeMessage:
+    def __init__(self, data: bytes = b"", file_name: str = "schedule.xlsx"):
+        self.document = SimpleNamespace(file_name=file_name, get_file=self._get_file)
+        self.replies = []
+        self._data = data
+
+    async def _get_file(self):
+        return SimpleNamespace(download_to_memory=self._download)
+
+    async def _download(self, out: BytesIO) -> None:
+        out.write(self._data)
+
+    async def reply_text(self, text: str, **_kwargs):
+        self.replies.append(text)
+        return self
+
+    async def edit_text(self, text: str, **_kwargs) -> None:
+        self.replies.append(text)
+
+
+def _summary(timings: list[float], **extra) -> dict:
+    timings = sorted(timings)
+    return {
+        "calls": len(timings),
+        "mean_ms": statistics.mean(timings) * 1e3,
+        "p50_ms": statistics.median(timings) * 1e3,
+        "p95_ms": timings[max(int(len(timings) * 0.95) - 1, 0)] * 1e3,
+        "max_ms": timings[-1] * 1e3,
+        "total_s": sum(timings),
+        **extra,
+    }
+
+
+def _time_sync(func, calls: list[tuple]) -> dict:
+    timings = []
+    for args in calls:
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return _summary(timings)
+
+
+async def _time_async(func, calls: list[tuple]) -> dict:
+    timings = []
+    for args in calls:
+        started = time.perf_counter()
+        await func(*args)
+        timings.append(time.perf_counter() - started)
+    await session.remove()
+    return _summary(timings)
+
+
+def _get_calls(config: SyntheticConfig, count: int) -> list[tuple]:
+    with Session(expire_on_commit=False) as db_session:
+        users = db_session.execute(select(User)).scalars().all()
+    rng = random.Random(config.seed)
+    return [
+        (rng.choice(users), rng.randrange(6), rng.random() < 0.5)
+        for _ in range(count)
+    ]
+
+
+async def _bench_schedules(calls: list[tuple]) -> dict:
+    results = {"get_schedules.sql": await _time_async(query_schedules, calls)}
+
+    load_schedule_index()
+    results["get_schedules.index"] = _time_sync(
+        get_schedule_index().get_schedules, calls,
+    )
+
+    render_calls = [
+        (user, await query_schedules(user, day, even_week), day, even_week)
+        for user, day, even_week in calls
+    ]
+    await session.remove()
+    results["schedules_text.render"] = _time_sync(
+        get_schedule_text_by_day, render_calls,
+    )
+
+    schedule_text_cache.clear()
+    results["schedules_text.cached_cold"] = await _time_async(
+        get_cached_schedule_text, calls,
+    )
+    results["schedules_text.cached_warm"] = await _time_async(
+        get_cached_schedule_text, calls,
+    )
+    return results
+
+
+async def _bench_import(xlsx: bytes, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        message = FakeMessage(xlsx)
+        update = SimpleNamespace(
+            message=message,
+            effective_user=SimpleNamespace(id=ADMIN_ID),
+        )
+        started = time.perf_counter()
+        await handle_file(update, None)
+        timings.append(time.perf_counter() - started)
+        await session.remove()
+        if not message.replies[-1].startswith("Данные успешно загружены"):
+            raise RuntimeError(message.replies[-1])
+    return {"handle_file": _summary(timings)}
+
+
+async def _bench_broadcasts(repeat: int) -> dict:
+    pipeline = SendPipeline(concurrency=8, global_rate=1e9, chat_rate=1e9)
+    results = {}
+    for notify_time in (8, 20):
+        timings = []
+        bot = FakeBot()
+        for _ in range(repeat):
+            started = time.perf_counter()
+            messages, _stats = await prepare_daily_broadcast(notify_time, BENCHMARK_DATE)
+            await pipeline.send(bot, messages)
+            timings.append(time.perf_counter() - started)
+            await session.remove()
+        results[f"broadcast.daily_{notify_time}"] = _summary(
+            timings, messages=bot.sent // repeat,
+        )
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await notification_plan.build(BENCHMARK_DATE)
+        timings.append(time.perf_counter() - started)
+        await session.remove()
+    results["notify_plan.build"] = _summary(timings)
+
+    timings = []
+    bot = FakeBot()
+    for _ in range(repeat):
+        for lesson_number in LESSON_TIMES:
+            started = time.perf_counter()
+            await pipeline.send(
+                bot,
+                await notification_plan.get_messages(lesson_number, BENCHMARK_DATE),
+            )
+            timings.append(time.perf_counter() - started)
+    results["broadcast.next_lesson"] = _summary(
+        timings, messages=bot.sent // repeat,
+    )
+    return results
+
+
+async def _run(config: SyntheticConfig, xlsx: bytes, args) -> dict:
+    calls = _get_calls(config, args.calls)
+    results = await _bench_schedules(calls)
+    results.update(await _bench_broadcasts(args.repeat))
+    results.update(await _bench_import(xlsx, args.repeat))
+    return results
+
+
+def _get_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            cwd=Path(__file__).parent,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_results(results: dict, baseline: dict = None) -> None:
+    for name, result in results.items():
+        line = (
+            f"{name:<28} mean {result['mean_ms']:10.3f} мс, "
+            f"p95 {result['p95_ms']:10.3f} мс, вызовов {result['calls']}"
+        )
+        if baseline and name in baseline:
+            change = result["mean_ms"] / baseline[name]["mean_ms"] * 100 - 100
+            line += f", {change:+.1f}% к базовому"
+        print(line)  # noqa: T201
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Бенчмарки горячих путей на синтетической базе",
+    )
+    parser.add_argument("--faculties", type=int, default=4)
+    parser.add_argument("--courses", type=int, default=4)
+    parser.add_argument("--specialities", type=int, default=8)
+    parser.add_argument("--lessons-per-day", type=int, default=4)
+    parser.add_argument("--teachers", type=int, default=200)
+    parser.add_argument("--users", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=Path("benchmark-results.json"))
+    parser.add_argument("--baseline", type=Path)
+    args = parser.parse_args()
+
+    config = SyntheticConfig(
+        faculties=args.faculties,
+        courses=args.courses,
+        specialities=args.specialities,
+        lessons_per_day=args.lessons_per_day,
+        teachers=args.teachers,
+        users=args.users,
+        seed=args.seed,
+    )
+    xlsx = BytesIO()
+    write_schedule_xlsx(xlsx, config)
+    with Session(expire_on_commit=False) as db_session:
+        prepare_database(db_session, config, xlsx.getvalue(), ADMIN_ID)
+
+    results = asyncio.run(_run(config, xlsx.getvalue(), args))
+    baseline = None
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"]
+    _print_results(results, baseline)
+
+    args.output.write_text(
+        json.dumps(
+            {
+                "commit": _get_commit(),
+                "created_at": datetime.datetime.now(tz=TIMEZONE).isoformat(),
+                "python": platform.python_version(),
+                "config": asdict(config),
+                "results": results,
+            },
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    print(f"Результаты записаны в {args.output}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import random
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO
+
+from openpyxl import Workbook
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from enums import UserRole, UserStatus
+from models import Group, User
+from schedules.importer import import_schedules
+
+__all__ = [
+    "populate_users",
+    "prepare_database",
+    "SyntheticConfig",
+    "write_schedule_xlsx",
+]
+
+HEADER = [
+    "Курс",
+    "Специальность",
+    "Подгруппа",
+    "День недели",
+    "Номер пары",
+    "Предмет",
+    "Преподаватель",
+    "Кабинет",
+    "Формат",
+    "Чётная неделя",
+    "Факультет",
+]
+DAYS = ["пн", "вт", "ср", "чт", "пт", "сб"]
+SUBJECTS = ["Математика", "Физика", "История", "Программирование", "Английский язык"]
+LESSON_TYPES = ["Лекция", "Практика", "Лабораторная", None]
+
+
+@dataclass
+class SyntheticConfig:
+    faculties: int = 4
+    courses: int = 4
+    specialities: int = 8
+    lessons_per_day: int = 4
+    teachers: int = 200
+    users: int = 3000
+    seed: int = 0
+
+    @property
+    def groups(self) -> int:
+        return self.faculties * self.courses * self.specialities
+
+    @property
+    def rows(self) -> int:
+        return self.groups * 2 * len(DAYS) * self.lessons_per_day
+
+
+def _get_teacher(rng: random.Random, config: SyntheticConfig) -> str | None:
+    teacher_id = rng.randrange(config.teachers)
+    if rng.random() < 0.05:
+        return None
+    if rng.random() < 0.1:
+        other_id = rng.randrange(config.teachers)
+        return f"Преподаватель{teacher_id} А.Б. / Преподаватель{other_id} В.Г."
+    return f"Преподаватель{teacher_id} А.Б."
+
+
+def write_schedule_xlsx(file: BinaryIO | Path, config: SyntheticConfig) -> int:
+    rng = random.Random(config.seed)
+    workbook = Workbook(write_only=True)
+    rows = 0
+    for faculty in range(config.faculties):
+        sheet = workbook.create_sheet(f"Факультет{faculty}")
+        sheet.append(HEADER)
+        for course in range(1, config.courses + 1):
+            for speciality in range(config.specialities):
+                for even_week in (0, 1):
+                    for day in DAYS:
+                        for lesson_number in range(1, config.lessons_per_day + 1):
+                            sheet.append([
+                                course,
+                                f"Специальность{speciality}",
+                                rng.choice([None, None, 1, 2]),
+                                day,
+                                lesson_number,
+                                rng.choice(SUBJECTS),
+                                _get_teacher(rng, config),
+                                rng.choice([None, rng.randint(100, 500), "А-12"]),
+                                rng.choice(LESSON_TYPES),
+                                even_week,
+                                f"Факультет{faculty}",
+                            ])
+                            rows += 1
+    workbook.save(file)
+    return rows
+
+
+def populate_users(db_session: Session, config: SyntheticConfig, admin_id: int) -> None:
+    rng = random.Random(config.seed)
+    group_ids = db_session.execute(select(Group.id)).scalars().all()
+    users = [
+        {
+            "id": admin_id,
+            "name": "admin",
+            "status": UserStatus.ADMIN,
+            "role": UserRole.STUDENT,
+            "group_id": group_ids[0],
+            "subgroup": 1,
+        },
+    ]
+    for user_id in range(1, config.users):
+        user = {
+            "id": admin_id + user_id,
+            "name": f"user{user_id}",
+            "status": UserStatus.USER,
+            "daily_notify": rng.random() < 0.7,
+            "notify_time": rng.choice([8, 20]),
+        }
+        if rng.random() < 0.1:
+            teacher_id = rng.randrange(config.teachers)
+            user.update(
+                role=UserRole.TEACHER,
+                teacher_name=f"Преподаватель{teacher_id} А.Б.",
+            )
+        else:
+            user.update(
+                role=UserRole.STUDENT,
+                group_id=rng.choice(group_ids),
+                subgroup=rng.choice([1, 2]),
+            )
+        users.append(user)
+    db_session.execute(insert(User), users)
+    db_session.commit()
+
+
+def prepare_database(
+        db_session: Session,
+        config: SyntheticConfig,
+        xlsx: bytes,
+        admin_id: int,
+) -> None:
+    if db_session.execute(select(func.count(User.id))).scalar():
+        raise SystemExit(
+            "База данных не пуста. Запустите бенчмарк на отдельной базе, "
+            "например: DATABASE_NAME=benchmark python -m benchmarks.suite",
+        )
+    import_schedules(db_session, BytesIO(xlsx))
+    populate_users(db_session, config, admin_id)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Генерация синтетического xlsx-файла расписания",
+    )
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--faculties", type=int, default=4)
+    parser.add_argument("--courses", type=int, default=4)
+    parser.add_argument("--specialities", type=int, default=8)
+    parser.add_argument("--lessons-per-day", type=int, default=4)
+    parser.add_argument("--teachers", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = SyntheticConfig(
+        faculties=args.faculties,
+        courses=args.courses,
+        specialities=args.specialities,
+        lessons_per_day=args.lessons_per_day,
+        teachers=args.teachers,
+        seed=args.seed,
+    )
+    rows = write_schedule_xlsx(args.path, config)
+    print(f"Записано строк: {rows} ({config.groups} групп) в {args.path}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import tempfile
+import time
+from io import BytesIO
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.offline import (
+    build_offline_application,
+    OfflineRequest,
+    process_update,
+    UpdateFactory,
+)
+from benchmarks.synthetic import prepare_database, SyntheticConfig, write_schedule_xlsx
+from database import AsyncSession, Session
+from handlers.registration_handlers import (
+    registration_handler,
+    SELECT_COURSE,
+    SELECT_SPECIALITY,
+)
+from models import Base
+from schedules.catalog import get_group_catalog
+
+__all__ = []
+
+ADMIN_ID = 1_000_000
+FIRST_USER_ID = 1
+SECOND_USER_ID = 2
+API_LATENCY = 0.05
+SYNTHETIC_CONFIG = SyntheticConfig(
+    faculties=1,
+    courses=2,
+    specialities=2,
+    teachers=5,
+    users=5,
+)
+
+
+def _get_state(user_id: int) -> int | None:
+    return registration_handler._conversations.get((user_id, user_id))
+
+
+async def _run() -> list[str]:
+    application = build_offline_application(OfflineRequest(API_LATENCY, b""))
+    updates = UpdateFactory(application.bot)
+    group_id = next(iter(get_group_catalog().groups))
+    errors = []
+
+    def expect(name: str, state: int | None, expected: int) -> None:
+        print(f"{name:<40} состояние {state} (ожидалось {expected})")  # noqa: T201
+        if state != expected:
+            errors.append(f"{name}: состояние {state}, ожидалось {expected}")
+
+    await application.initialize()
+    try:
+        await process_update(application, updates.text(FIRST_USER_ID, "/start"))
+        await asyncio.gather(
+            process_update(
+                application, updates.callback(FIRST_USER_ID, f"regFac_{group_id}"),
+            ),
+            process_update(
+                application, updates.callback(FIRST_USER_ID, f"regCourse_{group_id}"),
+            ),
+        )
+        expect("факультет и курс подряд", _get_state(FIRST_USER_ID), SELECT_SPECIALITY)
+
+        await process_update(application, updates.text(SECOND_USER_ID, "/start"))
+        await asyncio.gather(*(
+            process_update(
+                application, updates.callback(SECOND_USER_ID, f"regFac_{group_id}"),
+            )
+            for _ in range(2)
+        ))
+        expect("двойное нажатие факультета", _get_state(SECOND_USER_ID), SELECT_COURSE)
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            process_update(application, updates.text(FIRST_USER_ID, "/start")),
+            process_update(application, updates.text(SECOND_USER_ID, "/start")),
+        )
+        elapsed = time.perf_counter() - started
+        print(f"{'разные пользователи параллельно':<40} {elapsed:.2f} с")  # noqa: T201
+        if elapsed >= API_LATENCY * 2:
+            errors.append(
+                f"обновления разных пользователей выполнялись последовательно "
+                f"({elapsed:.2f} с)",
+            )
+    finally:
+        await application.shutdown()
+    return errors
+
+
+def main() -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/conversation.db")
+        async_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{directory}/conversation.db",
+        )
+        Base.metadata.create_all(engine)
+        Session.configure(bind=engine)
+        AsyncSession.configure(bind=async_engine)
+
+        xlsx = BytesIO()
+        write_schedule_xlsx(xlsx, SYNTHETIC_CONFIG)
+        with Session(expire_on_commit=False) as db_session:
+            prepare_database(db_session, SYNTHETIC_CONFIG, xlsx.getvalue(), ADMIN_ID)
+        try:
+            errors = asyncio.run(_run())
+        finally:
+            engine.dispose()
+            asyncio.run(async_engine.dispose())
+
+    for error in errors:
+        print(f"ОШИБКА: {error}")  # noqa: T201
+    print("Очерёдность диалогов: " + ("нарушена" if errors else "OK"))  # noqa: T201
+    raise SystemExit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import asyncio
+import datetime
+import logging
+from io import BytesIO
+from types import SimpleNamespace
+
+from sqlalchemy import select
+
+from benchmarks.offline import (
+    build_offline_application,
+    OfflineRequest,
+    process_update,
+    UpdateFactory,
+)
+from benchmarks.synthetic import prepare_database, SyntheticConfig, write_schedule_xlsx
+from database import count_queries, Session
+from enums import UserRole
+from main import (
+    daily_schedule_handler,
+    next_lesson_handler,
+    notification_plan_handler,
+    reachability_sync_handler,
+)
+from models import User
+from schedules.catalog import get_group_catalog, get_teacher_catalog
+from schedules.schedules_text import schedule_text_cache
+from users import user_cache
+
+__all__ = []
+
+ADMIN_ID = 1_000_000
+NEW_USER_ID = 1
+SYNTHETIC_CONFIG = SyntheticConfig(
+    faculties=2,
+    courses=2,
+    specialities=4,
+    teachers=40,
+    users=150,
+)
+
+QUERY_BUDGETS = {
+    "info_handler": 1,
+    "schedule_handler": 2,
+    "schedule_handler (преподаватель)": 2,
+    "next_day_schedule_handler": 2,
+    "start_schedule": 1,
+    "select_day": 2,
+    "start_notify_time": 1,
+    "select_notify_time": 2,
+    "start_registration": 0,
+    "select_faculty": 0,
+    "select_course": 0,
+    "select_speciality": 0,
+    "select_subgroup": 3,
+    "select_teacher": 0,
+    "select_teacher_page": 0,
+    "search_teacher": 0,
+    "finalize_registration": 3,
+    "users_list": 2,
+    "users_list csv": 2,
+    "users_stats": 5,
+    "cache_stats": 1,
+    "sql_trace": 1,
+    "message": 2,
+    "notification_plan_handler": 2,
+    "daily_schedule_handler 8": 2,
+    "daily_schedule_handler 20": 2,
+    "next_lesson_handler": 2,
+    "reachability_sync_handler": 1,
+    "handle_file": 16,
+    "rollback_schedules": 9,
+    "turn_off_daily_notify": 4,
+    "delete_all_schedules": 14,
+}
+
+
+def _get_users() -> tuple[int, int]:
+    with Session() as db_session:
+        student_id = db_session.execute(
+            select(User.id).where(
+                User.role == UserRole.STUDENT,
+                User.id != ADMIN_ID,
+            ).limit(1),
+        ).scalar_one()
+        teacher_id = db_session.execute(
+            select(User.id).where(User.role == UserRole.TEACHER).limit(1),
+        ).scalar_one()
+    return student_id, teacher_id
+
+
+def _get_steps(application, updates: UpdateFactory) -> list[tuple]:
+    student_id, teacher_id = _get_users()
+    group_id = next(iter(get_group_catalog().groups))
+    teacher_catalog_id, teacher_name = get_teacher_catalog().search()[0]
+
+    def job(name: str, **data) -> SimpleNamespace:
+        return SimpleNamespace(
+            application=application,
+            bot=application.bot,
+            job=SimpleNamespace(name=name, data=data),
+        )
+
+    return [
+        ("info_handler", updates.text(student_id, "Информация")),
+        ("schedule_handler", updates.text(student_id, "Расписание на сегодня")),
+        (
+            "schedule_handler (преподаватель)",
+            updates.text(teacher_id, "Расписание на сегодня"),
+        ),
+        ("next_day_schedule_handler", updates.text(student_id, "Расписание на завтра")),
+        ("start_schedule", updates.text(student_id, "Выбрать день")),
+        ("select_day", updates.callback(student_id, "scheduleDay_0_1")),
+        ("start_notify_time", updates.text(student_id, "Ежедневная рассылка")),
+        ("select_notify_time", updates.callback(student_id, "notifyTime_8")),
+        ("start_registration", updates.text(NEW_USER_ID, "/start")),
+        ("select_faculty", updates.callback(NEW_USER_ID, f"regFac_{group_id}")),
+        ("select_course", updates.callback(NEW_USER_ID, f"regCourse_{group_id}")),
+        ("select_speciality", updates.callback(NEW_USER_ID, f"regSpec_{group_id}")),
+        ("select_subgroup", updates.callback(NEW_USER_ID, f"regSubgroup_{group_id}_1")),
+        ("start_registration", updates.text(teacher_id, "/start")),
+        ("select_faculty", updates.callback(teacher_id, f"regFac_{group_id}")),
+        ("select_teacher", updates.callback(teacher_id, "reg_teacher")),
+        ("select_teacher_page", updates.callback(teacher_id, "regTeacherPage_1")),
+        ("search_teacher", updates.text(teacher_id, teacher_name[:4])),
+        (
+            "finalize_registration",
+            updates.callback(teacher_id, f"regTeacher_{teacher_catalog_id}"),
+        ),
+        ("users_list", updates.text(ADMIN_ID, "/users_list")),
+        ("users_list csv", updates.text(ADMIN_ID, "/users_list csv")),
+        ("users_stats", updates.text(ADMIN_ID, "/users_stats")),
+        ("cache_stats", updates.text(ADMIN_ID, "/cache_stats")),
+        ("sql_trace", updates.text(ADMIN_ID, "/sql_trace off")),
+        ("message", updates.text(ADMIN_ID, "/message Проверка")),
+        (
+            "notification_plan_handler",
+            notification_plan_handler(job("notification_plan")),
+        ),
+        (
+            "daily_schedule_handler 8",
+            daily_schedule_handler(job("daily_notify_8", notify_time=8)),
+        ),
+        (
+            "daily_schedule_handler 20",
+            daily_schedule_handler(job("daily_notify_20", notify_time=20)),
+        ),
+        (
+            "next_lesson_handler",
+            next_lesson_handler(job("next_lesson_handler_1", lesson_num=1)),
+        ),
+        (
+            "reachability_sync_handler",
+            reachability_sync_handler(
+                job("reachability_sync", since=datetime.datetime.min),
+            ),
+        ),
+        ("handle_file", updates.document(ADMIN_ID)),
+        ("rollback_schedules", updates.text(ADMIN_ID, "/rollback_schedules confirm")),
+        (
+            "turn_off_daily_notify",
+            updates.text(ADMIN_ID, "/turn_off_daily_notify confirm"),
+        ),
+        (
+            "delete_all_schedules",
+            updates.text(ADMIN_ID, "/delete_all_schedules confirm"),
+        ),
+    ]
+
+
+async def _run(xlsx: bytes) -> list[str]:
+    request = OfflineRequest(0, xlsx)
+    application = build_offline_application(request)
+    handler_errors = []
+
+    async def collect_error(_update: object, context) -> None:
+        handler_errors.append(context.error)
+
+    application.add_error_handler(collect_error)
+    await application.initialize()
+    errors = []
+    try:
+        for name, step in _get_steps(application, UpdateFactory(application.bot)):
+            user_cache.clear()
+            schedule_text_cache.clear()
+            api_calls = request.calls.total()
+            handler_errors.clear()
+            with count_queries() as queries:
+                if asyncio.iscoroutine(step):
+                    await step
+                else:
+                    await process_update(application, step)
+                while tasks := asyncio.all_tasks() - {asyncio.current_task()}:
+                    await asyncio.wait(tasks)
+
+            print(  # noqa: T201
+                f"{name:<34} запросов {queries.count:4} (лимит {QUERY_BUDGETS[name]})",
+            )
+            if queries.count > QUERY_BUDGETS[name]:
+                errors.append(
+                    f"{name}: {queries.count} запросов при лимите {QUERY_BUDGETS[name]}",
+                )
+            if handler_errors:
+                errors.append(f"{name}: исключение {handler_errors[0]!r}")
+            elif not asyncio.iscoroutine(step) and request.calls.total() == api_calls:
+                errors.append(f"{name}: обработчик не ответил пользователю")
+    finally:
+        await application.shutdown()
+    return errors
+
+
+def main() -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    xlsx = BytesIO()
+    write_schedule_xlsx(xlsx, SYNTHETIC_CONFIG)
+    with Session(expire_on_commit=False) as db_session:
+        prepare_database(db_session, SYNTHETIC_CONFIG, xlsx.getvalue(), ADMIN_ID)
+
+    errors = asyncio.run(_run(xlsx.getvalue()))
+    for error in errors:
+        print(f"ОШИБКА: {error}")  # noqa: T201
+    print("Бюджет запросов: " + ("превышен" if errors else "OK"))  # noqa: T201
+    raise SystemExit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import asyncio
+import datetime
+import re
+
+from sqlalchemy import event
+
+from consts import TIMEZONE
+from database import async_engine, engine, session
+from enums import UserRole
+from models import User
+from schedules.broadcast import get_day_schedules, prepare_daily_broadcast
+from schedules.schedules import query_schedules
+
+__all__ = []
+
+FULL_SCAN = re.compile(r"^SCAN (schedules|users|schedule_teachers)\b(?! USING)")
+
+HOT_QUERIES = {
+    "расписание студента": "ix_schedules_group_lookup",
+    "расписание преподавателя": "ix_teachers_normalized_name",
+    "расписание на день": "ix_schedules_day_lookup",
+    "ежедневная рассылка": "ix_users_daily_notify_notify_time",
+}
+
+
+async def _capture() -> dict[str, list[tuple]]:
+    statements = {}
+    current = []
+
+    def collect(_conn, _cursor, statement, parameters, _context, _executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            current.append((statement, parameters))
+
+    student = User(role=UserRole.STUDENT, group_id=1, subgroup=1)
+    teacher = User(role=UserRole.TEACHER, teacher_name="Иванов И.И.")
+    date = datetime.datetime.now(tz=TIMEZONE)
+    calls = {
+        "расписание студента": query_schedules(student, 0, True),
+        "расписание преподавателя": query_schedules(teacher, 0, True),
+        "расписание на день": get_day_schedules(0, True, 1),
+        "ежедневная рассылка": prepare_daily_broadcast(8, date),
+    }
+    event.listen(async_engine.sync_engine, "before_cursor_execute", collect)
+    try:
+        for name, call in calls.items():
+            await call
+            statements[name] = list(current)
+            current.clear()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", collect)
+        await session.remove()
+    return statements
+
+
+def _explain(statement: str, parameters: tuple) -> list[str]:
+    with engine.connect() as connection:
+        return [
+            row[-1] for row in connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}",
+                parameters,
+            )
+        ]
+
+
+def main() -> None:
+    errors = []
+    for name, statements in asyncio.run(_capture()).items():
+        plans = [_explain(*statement) for statement in statements]
+        print(f"{name}:")  # noqa: T201
+        for plan in plans:
+            for detail in plan:
+                print(f"    {detail}")  # noqa: T201
+                if FULL_SCAN.match(detail):
+                    errors.append(f"{name}: полный просмотр таблицы ({detail})")
+        if not any(HOT_QUERIES[name] in detail for plan in plans for detail in plan):
+            errors.append(f"{name}: не используется индекс {HOT_QUERIES[name]}")
+
+    for error in errors:
+        print(f"ОШИБКА: {error}")  # noqa: T201
+    print("Планы запросов: " + ("есть ошибки" if errors else "OK"))  # noqa: T201
+    raise SystemExit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
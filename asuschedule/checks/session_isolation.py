@@ -0,0 +1,112 @@
+import asyncio
+import random
+import tempfile
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import AsyncSession, session
+from models import Base, User
+from utils import SessionUpdateProcessor
+
+__all__ = []
+
+PROBE_USER_ID = -1
+PROBE_USERS = range(-2, -52, -1)
+
+
+async def _uncommitted_write(events: dict, seen: dict) -> None:
+    user = await session.get(User, PROBE_USER_ID)
+    user.notify_time = 20
+    await session.flush()
+    seen["writer"] = session()
+    events["flushed"].set()
+    await events["read"].wait()
+    seen["writer_value"] = user.notify_time
+    await session.rollback()
+
+
+async def _concurrent_read(events: dict, seen: dict) -> None:
+    await events["flushed"].wait()
+    user = await session.get(User, PROBE_USER_ID)
+    seen["reader"] = session()
+    seen["reader_value"] = user.notify_time
+    events["read"].set()
+
+
+async def _interleaved(user_id: int, seen: dict) -> None:
+    user = await session.get(User, user_id)
+    await asyncio.sleep(random.random() / 100)
+    user.name = f"probe {user_id}"
+    await asyncio.sleep(random.random() / 100)
+    same_user = await session.get(User, user_id)
+    seen[user_id] = (session(), same_user is user, user.name)
+    await session.rollback()
+
+
+async def _run(directory: str) -> list[str]:
+    probe_engine = create_async_engine(f"sqlite+aiosqlite:///{directory}/isolation.db")
+    AsyncSession.configure(bind=probe_engine)
+    try:
+        return await _check_isolation()
+    finally:
+        await probe_engine.dispose()
+
+
+async def _check_isolation() -> list[str]:
+    processor = SessionUpdateProcessor(8)
+    await processor.initialize()
+    errors = []
+
+    events = {"flushed": asyncio.Event(), "read": asyncio.Event()}
+    seen = {}
+    await asyncio.gather(
+        processor.process_update(None, _uncommitted_write(events, seen)),
+        processor.process_update(None, _concurrent_read(events, seen)),
+    )
+    if seen["writer"] is seen["reader"]:
+        errors.append("два обновления получили одну и ту же сессию")
+    if seen["reader_value"] != 8:
+        errors.append("читатель увидел незафиксированное изменение")
+    if seen["writer_value"] != 20:
+        errors.append("писатель потерял собственное изменение")
+
+    seen = {}
+    await asyncio.gather(*(
+        processor.process_update(None, _interleaved(user_id, seen))
+        for user_id in PROBE_USERS
+    ))
+    if len({id(db_session) for db_session, _, _ in seen.values()}) != len(PROBE_USERS):
+        errors.append("параллельные обновления разделили сессию")
+    for user_id, (_, identical, name) in seen.items():
+        if not identical or name != f"probe {user_id}":
+            errors.append(f"повреждено состояние сессии пользователя {user_id}")
+
+    if session.registry.registry:
+        errors.append("сессии не освобождены после обработки обновлений")
+    await processor.shutdown()
+    return errors
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        probe_engine = create_engine(f"sqlite:///{directory}/isolation.db")
+        Base.metadata.create_all(probe_engine)
+        with sessionmaker(bind=probe_engine)() as db_session:
+            db_session.add_all(
+                User(id=user_id, name="probe", notify_time=8)
+                for user_id in (PROBE_USER_ID, *PROBE_USERS)
+            )
+            db_session.commit()
+        probe_engine.dispose()
+        errors = asyncio.run(_run(directory))
+
+    for error in errors:
+        print(f"ОШИБКА: {error}")  # noqa: T201
+    print("Изоляция сессий: " + ("нарушена" if errors else "OK"))  # noqa: T201
+    raise SystemExit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
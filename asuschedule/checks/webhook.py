@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+from telegram.ext import Application
+
+from benchmarks.offline import OfflineRequest, UpdateFactory
+from main import build_application
+from webhook import WebhookServer
+
+__all__ = []
+
+PATH = "/telegram"
+SECRET_TOKEN = "check-secret"
+QUEUE_SIZE = 2
+
+
+async def _request(
+        port: int,
+        method: str,
+        path: str,
+        body: bytes = b"",
+        secret_token: str = None,
+) -> str:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    headers = f"Content-Length: {len(body)}\r\n"
+    if secret_token is not None:
+        headers += f"X-Telegram-Bot-Api-Secret-Token: {secret_token}\r\n"
+    try:
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\n{headers}\r\n".encode("latin-1") + body,
+        )
+        await writer.drain()
+        return (await reader.readline()).decode("latin-1").split(" ", 1)[1].strip()
+    finally:
+        writer.close()
+
+
+async def _run() -> list[str]:
+    request = OfflineRequest(0, b"")
+    application = build_application(
+        Application.builder().token("1:offline").request(request).updater(None)
+        .update_queue(asyncio.Queue(QUEUE_SIZE)),
+    )
+    updates = UpdateFactory(application.bot)
+
+    def get_body(text: str) -> bytes:
+        return json.dumps(updates.text(1, text).to_dict()).encode("utf-8")
+
+    errors = []
+
+    def expect(name: str, status: str, expected: str) -> None:
+        print(f"{name:<40} {status}")  # noqa: T201
+        if not status.startswith(expected):
+            errors.append(f"{name}: {status}, ожидалось {expected}")
+
+    async with application:
+        server = await WebhookServer(application, PATH, SECRET_TOKEN).start(
+            "127.0.0.1", 0,
+        )
+        port = server.sockets[0].getsockname()[1]
+        try:
+            expect("healthz", await _request(port, "GET", "/healthz"), "200")
+            expect("readyz до запуска", await _request(port, "GET", "/readyz"), "503")
+            for index in range(QUEUE_SIZE):
+                expect(
+                    f"обновление {index + 1}",
+                    await _request(port, "POST", PATH, get_body("/start"), SECRET_TOKEN),
+                    "200",
+                )
+            expect(
+                "переполнение очереди",
+                await _request(port, "POST", PATH, get_body("/start"), SECRET_TOKEN),
+                "503",
+            )
+            expect(
+                "без секретного токена",
+                await _request(port, "POST", PATH, get_body("/start")),
+                "403",
+            )
+            expect(
+                "неверный секретный токен",
+                await _request(port, "POST", PATH, get_body("/start"), "wrong"),
+                "403",
+            )
+            expect(
+                "некорректный JSON",
+                await _request(port, "POST", PATH, b"{", SECRET_TOKEN),
+                "400",
+            )
+            expect("неизвестный путь", await _request(port, "GET", "/"), "404")
+
+            await application.start()
+            await asyncio.wait_for(application.update_queue.join(), 10)
+            expect("readyz после запуска", await _request(port, "GET", "/readyz"), "200")
+            await application.stop()
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    if request.calls["sendMessage"] != QUEUE_SIZE:
+        errors.append(
+            f"обработано {request.calls['sendMessage']} обновлений из {QUEUE_SIZE}",
+        )
+    return errors
+
+
+def main() -> None:
+    errors = asyncio.run(_run())
+    for error in errors:
+        print(f"ОШИБКА: {error}")  # noqa: T201
+    print("Webhook: " + ("есть ошибки" if errors else "OK"))  # noqa: T201
+    raise SystemExit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
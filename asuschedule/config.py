@@ -14,3 +14,43 @@ INVERT_WEEK_PARITY = True if os.getenv(
 ) == "True" else False
 
 DATABASE_NAME = os.getenv("DATABASE_NAME")
+
+CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", 8))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", 8))
+
+SCHEDULE_TEXT_CACHE_SIZE = int(os.getenv("SCHEDULE_TEXT_CACHE_SIZE", 2048))
+SCHEDULE_TEXT_CACHE_TTL = int(os.getenv("SCHEDULE_TEXT_CACHE_TTL", 6 * 60 * 60))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 4096))
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 5 * 60))
+
+USE_SCHEDULE_INDEX = True if os.getenv(
+    "USE_SCHEDULE_INDEX",
+) == "True" else False
+
+ENABLE_METRICS = True if os.getenv(
+    "ENABLE_METRICS",
+) == "True" else False
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9100))
+
+SQL_TRACE = True if os.getenv(
+    "SQL_TRACE",
+) == "True" else False
+SQL_TRACE_MAX_QUERIES = int(os.getenv("SQL_TRACE_MAX_QUERIES", 20))
+SQL_TRACE_MAX_SECONDS = float(os.getenv("SQL_TRACE_MAX_SECONDS", 1.0))
+
+USE_WEBHOOK = True if os.getenv(
+    "USE_WEBHOOK",
+) == "True" else False
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 8080))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET_TOKEN = os.getenv("WEBHOOK_SECRET_TOKEN")
+UPDATE_QUEUE_SIZE = int(os.getenv("UPDATE_QUEUE_SIZE", 1000))
+
+USE_BROADCAST_WORKER = True if os.getenv(
+    "USE_BROADCAST_WORKER",
+) == "True" else False
+WORKER_SHARD = int(os.getenv("WORKER_SHARD", 0))
+WORKER_SHARDS = int(os.getenv("WORKER_SHARDS", 1))
@@ -36,3 +36,8 @@ DAY_NAMES = {
 
 
 TIMEZONE = ZoneInfo("Europe/Moscow")
+
+
+# Ограничения Telegram Bot API: ~30 сообщений в секунду всего и 1 в секунду на чат
+TELEGRAM_GLOBAL_RATE = 30
+TELEGRAM_CHAT_RATE = 1
@@ -1,16 +1,117 @@
+from asyncio import current_task
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
 from pathlib import Path
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import (
+    async_scoped_session,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import sessionmaker
 
 from config import DATABASE_NAME
+from migrations import migrate
 from models import Base
 
 
 Path("sqlite").mkdir(exist_ok=True)
 DATABASE_URL = f"sqlite:///sqlite/{DATABASE_NAME}.db"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///sqlite/{DATABASE_NAME}.db"
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,
+}
+
+
+def _set_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
+
 
 engine = create_engine(DATABASE_URL)
+event.listen(engine, "connect", _set_sqlite_pragmas)
 Base.metadata.create_all(engine)
+migrate(engine)
 Session = sessionmaker(bind=engine)
-session = Session()
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+session = async_scoped_session(AsyncSession, scopefunc=current_task)
+
+
+def with_session_scope(func):
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            await session.remove()
+    return wrapper
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *_args) -> None:
+        self.count += 1
+
+
+current_query_counters: ContextVar[tuple[QueryCounter, ...]] = ContextVar(
+    "current_query_counters",
+    default=(),
+)
+
+
+def _count_context_query(*_args) -> None:
+    for counter in current_query_counters.get():
+        counter.count += 1
+
+
+for _target in (engine, async_engine.sync_engine):
+    event.listen(_target, "before_cursor_execute", _count_context_query)
+
+
+@contextmanager
+def count_context_queries():
+    counter = QueryCounter()
+    token = current_query_counters.set((*current_query_counters.get(), counter))
+    try:
+        yield counter
+    finally:
+        current_query_counters.reset(token)
+
+
+@contextmanager
+def count_queries():
+    counter = QueryCounter()
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        for target in (engine, async_engine.sync_engine):
+            event.remove(target, "before_cursor_execute", counter)
+
+
+__all__ = [
+    "async_engine",
+    "AsyncSession",
+    "count_context_queries",
+    "count_queries",
+    "current_query_counters",
+    "engine",
+    "SQLITE_PRAGMAS",
+    "QueryCounter",
+    "Session",
+    "session",
+    "with_session_scope",
+]
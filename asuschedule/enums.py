@@ -11,7 +11,15 @@ class UserStatus(StrEnum):
     ADMIN = "admin"
 
 
+class OutboxStatus(StrEnum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    EXPIRED = "expired"
+
+
 __all__ = [
+    "OutboxStatus",
     "UserRole",
     "UserStatus",
 ]
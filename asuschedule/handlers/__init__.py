@@ -1,10 +1,14 @@
+from .chat_member_handlers import chat_member_handler
 from .daily_notify_handlers import notify_time_handler
 from .import_document_handler import handle_file
 from .registration_handlers import registration_handler
 from .schedule_handlers import schedule_table_handler
 from .staff_handlers import (
+    cache_stats_handler,
     delete_all_schedules_handler,
     message_handler,
+    rollback_schedules_handler,
+    sql_trace_handler,
     turn_off_daily_notify_handler,
     users_list_handler,
     users_stats_handler,
@@ -18,8 +22,12 @@ __all__ = [
     "message_handler",
     "users_list_handler",
     "users_stats_handler",
+    "cache_stats_handler",
     "turn_off_daily_notify_handler",
     "delete_all_schedules_handler",
+    "rollback_schedules_handler",
+    "sql_trace_handler",
     "handle_file",
+    "chat_member_handler",
     "error_handler",
 ]
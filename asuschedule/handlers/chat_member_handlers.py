@@ -0,0 +1,37 @@
+import logging
+
+from telegram import ChatMember, Update
+from telegram.constants import ChatType
+from telegram.ext import ChatMemberHandler
+
+from users import get_user, mark_reachable, mark_unreachable
+
+
+logger = logging.getLogger(__name__)
+
+
+async def bot_chat_member(update: Update, _) -> None:
+    chat_member = update.my_chat_member
+    if chat_member.chat.type != ChatType.PRIVATE:
+        return
+    user = await get_user(chat_member.chat.id)
+    if user is None:
+        return
+
+    status = chat_member.new_chat_member.status
+    if status == ChatMember.BANNED and user.unreachable_since is None:
+        await mark_unreachable({user.id: "Forbidden: bot was blocked by the user"})
+        logger.info(f"Пользователь {user.id} заблокировал бота")
+    elif status == ChatMember.MEMBER and user.unreachable_since is not None:
+        await mark_reachable(user.id)
+        logger.info(f"Пользователь {user.id} разблокировал бота")
+
+
+chat_member_handler = ChatMemberHandler(
+    bot_chat_member,
+    ChatMemberHandler.MY_CHAT_MEMBER,
+)
+
+__all__ = [
+    "chat_member_handler",
+]
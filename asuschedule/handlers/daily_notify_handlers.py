@@ -13,13 +13,15 @@ from telegram.ext import (
 
 from database import session
 from models import User
+from schedules.notify_plan import notification_plan
+from users import invalidate_user
 from utils import require_registration
 
 SELECT_NOTIFY_TIME = 5
 
 
 @require_registration
-async def start_notify_time(update: Update, _) -> int:
+async def start_notify_time(update: Update, _, user: User) -> int:
     keyboard = [
         [InlineKeyboardButton("8:00 (Утром)", callback_data="notifyTime_8")],
         [InlineKeyboardButton("20:00 (Вечером)", callback_data="notifyTime_20")],
@@ -38,7 +40,7 @@ async def select_notify_time(update: Update, _):
     await query.answer()
     user_choice = query.data.split("_")[-1]
 
-    user = session.get(User, query.from_user.id)
+    user = await session.get(User, query.from_user.id)
     if user:
         if user_choice == "disable":
             await query.edit_message_text(
@@ -51,7 +53,9 @@ async def select_notify_time(update: Update, _):
             await query.edit_message_text(
                 f"Вы выбрали время рассылки: {user_choice}:00",
             )
-        session.commit()
+        await session.commit()
+        invalidate_user(user.id)
+        notification_plan.update_user(user)
 
     return ConversationHandler.END
 
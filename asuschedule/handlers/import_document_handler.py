@@ -1,28 +1,50 @@
+import asyncio
 import logging
+import time
 from io import BytesIO
 
-import pandas as pd
-from sqlalchemy import select, delete
-from telegram import Update
+from telegram import Message, Update
+from telegram.error import TelegramError
 
-from consts import WEEK_NAMES
-from database import session
-from models import Group, Schedule
-from utils import require_staff
-
-days_of_week = {
-    "пн": 0,
-    "вт": 1,
-    "ср": 2,
-    "чт": 3,
-    "пт": 4,
-    "сб": 5,
-    "вс": 6,
-}
+from database import Session
+from schedules.importer import import_schedules, ImportReport
+from schedules.refresh import refresh_schedule_views
+from schedules.versions import import_lock
+from utils import LoopLagMonitor, require_staff
 
 
 logger = logging.getLogger(__name__)
 
+PROGRESS_INTERVAL = 2.0
+
+
+async def _edit_progress(status_message: Message, text: str) -> None:
+    try:
+        await status_message.edit_text(text)
+    except TelegramError as e:
+        logger.warning(f"Failed to update import progress: {e}")
+
+
+def _run_import(
+        file_io: BytesIO,
+        status_message: Message,
+        loop: asyncio.AbstractEventLoop,
+) -> ImportReport:
+    last_progress = time.monotonic()
+
+    def on_progress(rows: int) -> None:
+        nonlocal last_progress
+        if time.monotonic() - last_progress < PROGRESS_INTERVAL:
+            return
+        last_progress = time.monotonic()
+        asyncio.run_coroutine_threadsafe(
+            _edit_progress(status_message, f"Обработано строк: {rows}..."),
+            loop,
+        )
+
+    with Session(expire_on_commit=False) as import_session:
+        return import_schedules(import_session, file_io, on_progress)
+
 
 @require_staff
 async def handle_file(update: Update, _):
@@ -35,80 +57,37 @@ async def handle_file(update: Update, _):
         return
 
     file = await document.get_file()
-    file_data = await file.download_as_bytearray()
-    file_io = BytesIO(file_data)
-
-    await update.message.reply_text("Файл загружен. Обрабатываю данные...")
+    file_io = BytesIO()
+    await file.download_to_memory(file_io)
+    file_io.seek(0)
+
+    status_message = await update.message.reply_text(
+        "Файл загружен. Обрабатываю данные...",
+    )
+    lag_monitor = LoopLagMonitor()
+    lag_monitor.start()
     try:
-        dataframe = pd.read_excel(file_io, sheet_name=None)
-        combined_df = pd.concat(
-            dataframe.values(),
-            ignore_index=True,
-        ).replace({float("nan"): None})
-
-        session.execute(delete(Schedule))
-
-        for val in combined_df.values:
-            course = val[0]
-            speciality = val[1]
-            subgroup = int(val[2]) if isinstance(val[2], (float, int)) else None
-            day_of_week = str(val[3])
-            lesson_number = int(val[4])
-            subject = val[5]
-            teacher = val[6] if isinstance(val[6], str) else None
-            room = str(val[7]) if isinstance(val[7], (str, int)) else None
-            lesson_type = val[8] if isinstance(val[8], str) else None
-            is_even_week = bool(int(val[9]))
-            faculty = val[10]
-
-            num_day_of_week = days_of_week.get(day_of_week)
-
-            group = session.execute(
-                select(Group).filter_by(
-                    course=course,
-                    speciality=speciality,
-                    faculty=faculty,
-                ),
-            ).scalar_one_or_none()
-            if not group:
-                group = Group(
-                    course=course,
-                    faculty=faculty,
-                    speciality=speciality,
-                )
-                session.add(group)
-                logger.info(
-                    f"Добавлена новая группа {group.get_name()}",
-                )
-
-            session.add(
-                Schedule(
-                    day_of_week=num_day_of_week,
-                    lesson_number=lesson_number,
-                    subject=subject,
-                    teacher=teacher,
-                    room=room,
-                    subgroup=subgroup,
-                    group_id=group.id,
-                    lesson_type=lesson_type,
-                    is_even_week=is_even_week,
-                ),
-            )
-            logger.info(
-                f"Добавлено расписание для группы "
-                f"{group.get_name()} и пары номер {lesson_number} "
-                f"в {day_of_week} ({WEEK_NAMES[int(is_even_week)]}).",
+        async with import_lock:
+            report = await asyncio.to_thread(
+                _run_import, file_io, status_message, asyncio.get_running_loop(),
             )
-
-        session.commit()
-        await update.message.reply_text(
-            "Данные успешно загружены и сохранены в базу данных.",
-        )
+            await refresh_schedule_views()
     except Exception as e:
-        session.rollback()
+        logger.exception("Schedule import failed")
         await update.message.reply_text(
             f"Произошла ошибка при обработке файла. {e}",
         )
+        return
+    finally:
+        lag_monitor.stop()
+
+    logger.info(
+        f"Максимальная задержка цикла событий во время загрузки: "
+        f"{lag_monitor.max_lag * 1000:.0f} мс",
+    )
+    await update.message.reply_text(
+        f"Данные успешно загружены и сохранены в базу данных.\n{report.to_text()}",
+    )
 
 
 __all__ = [
@@ -1,10 +1,13 @@
-from sqlalchemy import select
+import re
+
 from telegram import (
+    CallbackQuery,
     InlineKeyboardButton,
     InlineKeyboardMarkup,
     Update,
     Message,
 )
+from telegram.error import BadRequest
 from telegram.ext import (
     CallbackQueryHandler,
     CommandHandler,
@@ -15,8 +18,11 @@ from telegram.ext import (
 )
 
 from database import session
-from models import Group, Schedule, User
-from utils import get_main_keyboard
+from models import Group, Teacher, User
+from schedules.catalog import get_group_catalog, get_teacher_catalog
+from schedules.notify_plan import notification_plan
+from users import invalidate_user
+from utils import get_main_keyboard, MAIN_KEYBOARD
 
 (
     SELECT_FACULTY,
@@ -26,22 +32,28 @@ from utils import get_main_keyboard
     SELECT_TEACHER,
 ) = range(5)
 
+TEACHER_PAGE_SIZE = 10
+MAIN_KEYBOARD_FILTER = filters.Regex(
+    rf"(?i)^({'|'.join(re.escape(button) for row in MAIN_KEYBOARD for button in row)})$",
+)
 
-async def start_registration(update: Update, _) -> int:
-    faculties = [
-        faculty[:32] for faculty in session.execute(
-            select(
-                Group.faculty,
-            ).distinct(),
-        ).scalars().all()
-    ]
 
+async def _get_catalog_group(query: CallbackQuery) -> Group | None:
+    group = get_group_catalog().get_group(int(query.data.split("_")[1]))
+    if group is None:
+        await query.edit_message_text(
+            "Список групп обновился. Начните регистрацию заново: /start",
+        )
+    return group
+
+
+async def start_registration(update: Update, _) -> int:
     keyboard = [
         [
             InlineKeyboardButton(
-                f"{faculty}", callback_data=f"regFac_{faculty}",
+                f"{faculty[:32]}", callback_data=f"regFac_{group_id}",
             ),
-        ] for faculty in faculties
+        ] for group_id, faculty in get_group_catalog().get_faculties()
     ]
     keyboard.append([InlineKeyboardButton("Отмена", callback_data="reg_cancel")])
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -50,24 +62,18 @@ async def start_registration(update: Update, _) -> int:
     return SELECT_FACULTY
 
 
-async def select_faculty(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+async def select_faculty(update: Update, _) -> int:
     query = update.callback_query
     await query.answer()
-    context.user_data["faculty"] = query.data.split("_")[-1]
-
-    courses = session.execute(
-        select(
-            Group.course,
-        ).order_by(
-            Group.course,
-        ).distinct(),
-    ).scalars().all()
+    group = await _get_catalog_group(query)
+    if group is None:
+        return ConversationHandler.END
 
     keyboard = [
         [
             InlineKeyboardButton(
-                f"{course} курс", callback_data=f"regCourse_{course}",
-            ) for course in courses
+                f"{course} курс", callback_data=f"regCourse_{group_id}",
+            ) for group_id, course in get_group_catalog().get_courses(group.faculty)
         ],
         [InlineKeyboardButton("Преподаватель", callback_data="reg_teacher")],
         [InlineKeyboardButton("Отмена", callback_data="reg_cancel")],
@@ -78,27 +84,21 @@ async def select_faculty(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     return SELECT_COURSE
 
 
-async def select_course(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+async def select_course(update: Update, _) -> int:
     query = update.callback_query
     await query.answer()
-    context.user_data["course"] = query.data.split("_")[-1]
-
-    specialities = session.execute(
-        select(
-            Group.speciality,
-        ).filter_by(
-            course=context.user_data["course"],
-        ).where(
-            Group.faculty.ilike(f"%{context.user_data['faculty']}%"),
-        ).distinct(),
-    ).scalars().all()
+    group = await _get_catalog_group(query)
+    if group is None:
+        return ConversationHandler.END
 
     keyboard = [
         [
             InlineKeyboardButton(
-                f"{speciality[:32]}", callback_data=f"regSpec_{speciality[:24]}",
+                f"{speciality[:32]}", callback_data=f"regSpec_{group_id}",
             ),
-        ] for speciality in specialities
+        ] for group_id, speciality in get_group_catalog().get_specialities(
+            group.faculty, group.course,
+        )
     ]
     keyboard.append([InlineKeyboardButton("Отмена", callback_data="reg_cancel")])
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -107,44 +107,100 @@ async def select_course(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     return SELECT_SPECIALITY
 
 
-async def select_teacher(update: Update, _) -> int:
-    query = update.callback_query
-    await query.answer()
-
-    teachers = session.execute(
-        select(
-            Schedule.teacher,
-        ).where(
-            Schedule.teacher.isnot(None),
-            ~Schedule.teacher.contains("/"),
-        ).distinct().order_by(Schedule.teacher),
-    ).scalars().all()
-
+def _get_teacher_markup(
+        teachers: list[tuple[int, str]],
+        page: int,
+) -> InlineKeyboardMarkup:
+    pages = max(1, -(-len(teachers) // TEACHER_PAGE_SIZE))
+    page = min(max(page, 0), pages - 1)
     keyboard = [
         [
-            InlineKeyboardButton(f"{teacher}", callback_data=f"regTeacher_{teacher}"),
-        ] for teacher in teachers
+            InlineKeyboardButton(f"{name}", callback_data=f"regTeacher_{teacher_id}"),
+        ] for teacher_id, name in teachers[
+            page * TEACHER_PAGE_SIZE:(page + 1) * TEACHER_PAGE_SIZE
+        ]
     ]
+    if pages > 1:
+        keyboard.append(
+            [
+                InlineKeyboardButton(
+                    "◀️", callback_data=f"regTeacherPage_{(page - 1) % pages}",
+                ),
+                InlineKeyboardButton(
+                    f"{page + 1}/{pages}", callback_data=f"regTeacherPage_{page}",
+                ),
+                InlineKeyboardButton(
+                    "▶️", callback_data=f"regTeacherPage_{(page + 1) % pages}",
+                ),
+            ],
+        )
     keyboard.append(
         [
             InlineKeyboardButton("Отмена", callback_data="reg_cancel"),
         ],
     )
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    return InlineKeyboardMarkup(keyboard)
+
+
+async def select_teacher(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    query = update.callback_query
+    await query.answer()
+    context.user_data["teacher_search"] = ""
+
+    await query.edit_message_text(
+        "Выберите преподавателя или отправьте начало фамилии для поиска:",
+        reply_markup=_get_teacher_markup(get_teacher_catalog().search(), 0),
+    )
+    return SELECT_TEACHER
+
 
-    await query.edit_message_text("Выберите преподавателя:", reply_markup=reply_markup)
+async def select_teacher_page(
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+) -> int:
+    query = update.callback_query
+    await query.answer()
+    teachers = get_teacher_catalog().search(context.user_data.get("teacher_search", ""))
+
+    try:
+        await query.edit_message_reply_markup(
+            reply_markup=_get_teacher_markup(teachers, int(query.data.split("_")[-1])),
+        )
+    except BadRequest as e:
+        if "not modified" not in e.message:
+            raise
     return SELECT_TEACHER
 
 
-async def select_speciality(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+async def search_teacher(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    context.user_data["teacher_search"] = update.message.text
+    teachers = get_teacher_catalog().search(update.message.text)
+    if not teachers:
+        await update.message.reply_text(
+            "🔍 Преподаватели не найдены. Попробуйте другой запрос.",
+        )
+        return SELECT_TEACHER
+
+    await update.message.reply_text(
+        f"🔍 Найдено преподавателей: {len(teachers)}",
+        reply_markup=_get_teacher_markup(teachers, 0),
+    )
+    return SELECT_TEACHER
+
+
+async def select_speciality(update: Update, _) -> int:
     query = update.callback_query
     await query.answer()
-    context.user_data["speciality"] = query.data.split("_")[-1]
+    group_id = int(query.data.split("_")[1])
 
     keyboard = [
         [
-            InlineKeyboardButton("1 Подгруппа", callback_data="regSubgroup_1"),
-            InlineKeyboardButton("2 Подгруппа", callback_data="regSubgroup_2"),
+            InlineKeyboardButton(
+                "1 Подгруппа", callback_data=f"regSubgroup_{group_id}_1",
+            ),
+            InlineKeyboardButton(
+                "2 Подгруппа", callback_data=f"regSubgroup_{group_id}_2",
+            ),
         ],
         [InlineKeyboardButton("Отмена", callback_data="reg_cancel")],
     ]
@@ -157,43 +213,36 @@ async def select_speciality(update: Update, context: ContextTypes.DEFAULT_TYPE)
     return SELECT_SUBGROUP
 
 
-async def select_subgroup(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+async def select_subgroup(update: Update, _) -> int:
     query = update.callback_query
     await query.answer()
 
     user_id = query.from_user.id
     name = query.from_user.first_name
     username = query.from_user.username
-    subgroup = int(query.data.split("_")[-1])
-
-    course = context.user_data["course"]
-    faculty = context.user_data["faculty"]
-    speciality = context.user_data["speciality"]
-
-    group = session.execute(
-        select(
-            Group,
-        ).filter_by(
-            course=course,
-        ).where(
-            Group.faculty.ilike(f"%{faculty}%"),
-            Group.speciality.ilike(f"%{speciality}%"),
-        ),
-    ).scalar_one_or_none()
-    user = session.get(User, user_id)
+    _, group_id, subgroup = query.data.split("_")
+
+    group = await session.get(Group, int(group_id))
+    if group is None:
+        await query.edit_message_text(
+            "Группа не найдена. Начните регистрацию заново: /start",
+        )
+        return ConversationHandler.END
+
+    user = await session.get(User, user_id)
     if not user:
-        new_user = User(
+        user = User(
             id=user_id,
             username=username,
             name=name,
         )
-        new_user.make_student(group.id, subgroup)
-        session.add(new_user)
+        user.make_student(group.id, int(subgroup))
+        session.add(user)
         await query.edit_message_text(
             f"Регистрация завершена! Привет, {name}.",
         )
     else:
-        user.make_student(group.id, subgroup)
+        user.make_student(group.id, int(subgroup))
         await query.edit_message_text(
             "Ваша группа изменена.",
         )
@@ -202,7 +251,9 @@ async def select_subgroup(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             "Теперь вам доступны команды бота!",
             reply_markup=get_main_keyboard(),
         )
-    session.commit()
+    await session.commit()
+    invalidate_user(user_id)
+    notification_plan.update_user(user)
     return ConversationHandler.END
 
 
@@ -216,17 +267,24 @@ async def finalize_registration(
     user_id = query.from_user.id
     name = query.from_user.first_name
     username = query.from_user.username
-    teacher_name = query.data.split("_")[-1]
 
-    user = session.get(User, user_id)
+    teacher = await session.get(Teacher, int(query.data.split("_")[-1]))
+    if teacher is None:
+        await query.edit_message_text(
+            "Преподаватель не найден. Начните регистрацию заново: /start",
+        )
+        return ConversationHandler.END
+    teacher_name = teacher.name
+
+    user = await session.get(User, user_id)
     if not user:
-        new_user = User(
+        user = User(
             id=user_id,
             username=username,
             name=name,
         )
-        new_user.make_teacher(teacher_name)
-        session.add(new_user)
+        user.make_teacher(teacher_name)
+        session.add(user)
         await query.edit_message_text(
             f"Регистрация завершена! Преподаватель: {teacher_name}.",
         )
@@ -240,7 +298,9 @@ async def finalize_registration(
             "Теперь вам доступны команды бота!",
             reply_markup=get_main_keyboard(),
         )
-    session.commit()
+    await session.commit()
+    invalidate_user(user_id)
+    notification_plan.update_user(user)
     return ConversationHandler.END
 
 
@@ -264,20 +324,25 @@ registration_handler = ConversationHandler(
     ],
     states={
         SELECT_FACULTY: [
-            CallbackQueryHandler(select_faculty, pattern=r"^regFac_"),
+            CallbackQueryHandler(select_faculty, pattern=r"^regFac_\d+$"),
         ],
         SELECT_COURSE: [
-            CallbackQueryHandler(select_course, pattern=r"^regCourse_"),
+            CallbackQueryHandler(select_course, pattern=r"^regCourse_\d+$"),
             CallbackQueryHandler(select_teacher, pattern=r"^reg_teacher$"),
         ],
         SELECT_SPECIALITY: [
-            CallbackQueryHandler(select_speciality, pattern=r"^regSpec_"),
+            CallbackQueryHandler(select_speciality, pattern=r"^regSpec_\d+$"),
         ],
         SELECT_SUBGROUP: [
-            CallbackQueryHandler(select_subgroup, pattern=r"^regSubgroup_"),
+            CallbackQueryHandler(select_subgroup, pattern=r"^regSubgroup_\d+_[12]$"),
         ],
         SELECT_TEACHER: [
-            CallbackQueryHandler(finalize_registration, pattern=r"^regTeacher_"),
+            CallbackQueryHandler(finalize_registration, pattern=r"^regTeacher_\d+$"),
+            CallbackQueryHandler(select_teacher_page, pattern=r"^regTeacherPage_\d+$"),
+            MessageHandler(
+                filters.TEXT & ~filters.COMMAND & ~MAIN_KEYBOARD_FILTER,
+                search_teacher,
+            ),
         ],
     },
     fallbacks=[
@@ -13,17 +13,16 @@ from telegram.ext import (
 )
 
 from consts import DAY_NAMES, WEEK_NAMES
-from database import session
 from models import User
-from schedules.schedules import get_schedules
-from schedules.schedules_text import get_schedule_text_by_day
+from schedules.schedules_text import get_cached_schedule_text
+from users import get_user
 from utils import require_registration
 
 SELECT_DAY = 6
 
 
 @require_registration
-async def start_schedule(update: Update, _) -> int | None:
+async def start_schedule(update: Update, _, user: User) -> int | None:
     keyboard = [
         [
             InlineKeyboardButton(
@@ -49,12 +48,11 @@ async def select_day(update: Update, _) -> int | None:
     await query.answer()
     user_choice = query.data.split("_")
 
-    user = session.get(User, update.effective_user.id)
+    user = await get_user(update.effective_user.id)
 
     day, is_even_week = (int(user_choice[-2]), bool(int(user_choice[-1])))
 
-    schedules = get_schedules(user, day, is_even_week)
-    schedules_text = get_schedule_text_by_day(user, schedules, day, is_even_week)
+    schedules_text = await get_cached_schedule_text(user, day, is_even_week)
 
     await query.edit_message_text(text=schedules_text, parse_mode=ParseMode.HTML)
     return ConversationHandler.END
@@ -1,31 +1,101 @@
+import asyncio
+import csv
 import html
+import io
 import json
 import logging
 import traceback
 
-from sqlalchemy import delete, select, update as sql_update
+from sqlalchemy import func, select, update as sql_update
+from sqlalchemy.orm import joinedload
 from telegram import Update
 from telegram.constants import ParseMode
+from telegram.error import TelegramError
 from telegram.ext import CommandHandler, ContextTypes
 
-from database import session
+from config import USE_BROADCAST_WORKER
+from database import Session, session
 from enums import UserStatus, UserRole
-from models import Schedule, User
+from models import Group, User
+from outbox import enqueue_messages
+from schedules.notify_plan import notification_plan
+from schedules.refresh import refresh_schedule_views
+from schedules.schedules_text import schedule_text_cache
+from schedules.versions import (
+    create_version,
+    import_lock,
+    publish_version,
+    rollback_version,
+)
+from sender import send_pipeline, SendReport
+from sql_trace import sql_tracer
+from users import collect_unreachable, mark_unreachable, user_cache
 from utils import require_staff
 
 
 logger = logging.getLogger(__name__)
 
 
+USERS_LIST_CHUNK_SIZE = 15
+USERS_LIST_CSV_COLUMNS = [
+    "id",
+    "username",
+    "name",
+    "role",
+    "status",
+    "faculty",
+    "group",
+    "subgroup",
+    "teacher_name",
+    "daily_notify",
+    "notify_time",
+]
+
+
+async def _stream_users():
+    return await session.stream_scalars(
+        select(User).options(
+            joinedload(User.group),
+        ).order_by(
+            User.role,
+            User.id,
+        ).execution_options(yield_per=500),
+    )
+
+
+def _get_csv_row(user: User) -> list:
+    return [
+        user.id,
+        user.username or "",
+        user.name,
+        user.role,
+        user.status,
+        user.group.faculty if user.group else "",
+        user.group.get_short_name() if user.group else "",
+        user.subgroup or "",
+        user.teacher_name or "",
+        int(bool(user.daily_notify)),
+        user.notify_time,
+    ]
+
+
 @require_staff
-async def users_list(update: Update, _):
-    users = session.execute(
-        select(User).order_by(User.role),
-    ).scalars().all()
-    chunk_size = 15
-    user_chunks = [users[i:i + chunk_size] for i in range(0, len(users), chunk_size)]
-
-    for chunk in user_chunks:
+async def users_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    users = await _stream_users()
+    if "csv" in context.args:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(USERS_LIST_CSV_COLUMNS)
+        async for user in users:
+            writer.writerow(_get_csv_row(user))
+        await update.message.reply_document(
+            document=buffer.getvalue().encode("utf-8-sig"),
+            filename="users.csv",
+            caption="👥 Список пользователей",
+        )
+        return
+
+    async for chunk in users.partitions(USERS_LIST_CHUNK_SIZE):
         await update.message.reply_text(
             "\n------------\n".join(
                 [user.to_text() for user in chunk],
@@ -35,24 +105,128 @@ async def users_list(update: Update, _):
 
 @require_staff
 async def users_stats(update: Update, _):
-    users = session.execute(select(User)).scalars().all()
+    role_counts = (await session.execute(
+        select(
+            User.role,
+            func.count(),
+            func.count(User.unreachable_since),
+        ).group_by(
+            User.role,
+        ),
+    )).all()
+    roles = {role: count for role, count, _ in role_counts}
+    notify_times = (await session.execute(
+        select(
+            User.notify_time,
+            func.count(),
+        ).filter_by(
+            daily_notify=True,
+        ).group_by(
+            User.notify_time,
+        ).order_by(
+            User.notify_time,
+        ),
+    )).all()
+    faculties = (await session.execute(
+        select(
+            Group.faculty,
+            func.count(User.id),
+        ).join(
+            User.group,
+        ).group_by(
+            Group.faculty,
+        ).order_by(
+            func.count(User.id).desc(),
+            Group.faculty,
+        ),
+    )).all()
+    unfinished = (await session.execute(
+        select(func.count()).select_from(User).filter_by(
+            role=UserRole.STUDENT,
+            group_id=None,
+        ),
+    )).scalar()
+
+    lines = [
+        "📊 <b>Статистика пользователей:</b>\n",
+        f"▪️ Всего пользователей: {sum(roles.values())}",
+        f"▪️ Студентов: {roles.get(UserRole.STUDENT, 0)}",
+        f"▪️ Преподавателей: {roles.get(UserRole.TEACHER, 0)}",
+        f"▪️ Не завершили регистрацию: {unfinished}",
+        f"▪️ Недоступны для рассылок: {sum(count for *_, count in role_counts)}",
+        f"▪️ Включена ежедневная рассылка: {sum(count for _, count in notify_times)}",
+    ]
+    lines.extend(
+        f"    ▫️ в {notify_time}:00: {count}" for notify_time, count in notify_times
+    )
+    if faculties:
+        lines.append("\n🏛️ <b>По факультетам:</b>\n")
+        lines.extend(
+            f"▪️ {html.escape(faculty)}: {count}" for faculty, count in faculties
+        )
     await update.message.reply_text(
-        f"📊 <b>Статистика пользователей:</b>\n\n"
-        f"▪️ Всего пользователей: {len(users)}\n"
-        f"▪️ Преподавателей: {len([i for i in users if i.role == UserRole.TEACHER])}\n"
-        f"▪️ Включена ежедневная рассылка: {len([i for i in users if i.daily_notify])}",
+        "\n".join(lines),
         parse_mode=ParseMode.HTML,
     )
 
 
+async def _broadcast_message(
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        msg: str,
+        chat_ids: list[int],
+) -> None:
+    status_message = await update.message.reply_text(
+        f"📤 Рассылка запущена: {len(chat_ids)} получателей.",
+    )
+
+    async def on_progress(report: SendReport) -> None:
+        text = (
+            f"✅ Сообщение отправлено: {report.to_text()}"
+            if report.finished else f"📤 Рассылка: {report.to_text()}"
+        )
+        try:
+            await status_message.edit_text(text)
+        except TelegramError as e:
+            logger.warning(f"Failed to update broadcast progress: {e}")
+
+    messages = [(chat_id, msg) for chat_id in chat_ids]
+    send_errors = {}
+    report = await send_pipeline.send(
+        context.bot,
+        messages,
+        on_progress=on_progress,
+        on_result=collect_unreachable(messages, send_errors),
+    )
+    pruned = await mark_unreachable(send_errors)
+    logger.info(
+        f"Рассылка сообщения: {report.to_text()}, исключено недоступных {pruned}",
+    )
+    if pruned:
+        await update.message.reply_text(
+            f"🚫 Исключено из рассылок недоступных получателей: {pruned}.",
+        )
+
+
 @require_staff
 async def message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if context.args:
         msg = " ".join(context.args)
-        users = session.execute(select(User)).scalars().all()
-        for user in users:
-            await context.bot.send_message(chat_id=user.id, text=msg)
-        await update.message.reply_text("✅ Сообщение отправлено.")
+        chat_ids = (await session.execute(
+            select(User.id).filter_by(unreachable_since=None),
+        )).scalars().all()
+        if USE_BROADCAST_WORKER:
+            count = await enqueue_messages(
+                ((chat_id, msg) for chat_id in chat_ids), None, "message",
+            )
+            await update.message.reply_text(
+                f"📤 Рассылка поставлена в очередь: {count} получателей.",
+            )
+            return
+        context.application.create_task(
+            _broadcast_message(update, context, msg, chat_ids),
+            update=update,
+        )
     else:
         await update.message.reply_text(
             "⚠️ Пожалуйста, укажите сообщение после команды.",
@@ -66,15 +240,28 @@ async def turn_off_daily_notify(update: Update, context: ContextTypes.DEFAULT_TY
             "❗ Требуется подтверждение операции (укажите 'confirm' после команды).",
         )
         return
-    session.execute(
+    await session.execute(
         sql_update(User).values(daily_notify=False),
     )
-    session.commit()
+    await session.commit()
+    user_cache.clear()
+    await notification_plan.rebuild()
     await update.message.reply_text(
         "🌙 Ежедневные уведомления отключены для всех пользователей.",
     )
 
 
+def _clear_schedules() -> None:
+    with Session() as db_session:
+        version = create_version(db_session)
+        publish_version(db_session, version.id)
+
+
+def _rollback_schedules() -> int | None:
+    with Session() as db_session:
+        return rollback_version(db_session)
+
+
 @require_staff
 async def delete_all_schedules(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if "confirm" not in context.args:
@@ -82,13 +269,62 @@ async def delete_all_schedules(update: Update, context: ContextTypes.DEFAULT_TYP
             "❗ Требуется подтверждение операции (укажите 'confirm' после команды).",
         )
         return
-    session.execute(delete(Schedule))
-    session.commit()
+    async with import_lock:
+        await asyncio.to_thread(_clear_schedules)
+        await refresh_schedule_views()
+    await update.message.reply_text(
+        "🗑️ Все расписания успешно удалены. "
+        "Вернуть предыдущее расписание можно командой /rollback_schedules.",
+    )
+
+
+@require_staff
+async def rollback_schedules(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if "confirm" not in context.args:
+        await update.message.reply_text(
+            "❗ Требуется подтверждение операции (укажите 'confirm' после команды).",
+        )
+        return
+    async with import_lock:
+        version_id = await asyncio.to_thread(_rollback_schedules)
+        if version_id is not None:
+            await refresh_schedule_views()
+    if version_id is None:
+        await update.message.reply_text(
+            "⚠️ Нет предыдущей версии расписания для отката.",
+        )
+        return
     await update.message.reply_text(
-        "🗑️ Все расписания успешно удалены.",
+        f"↩️ Расписание возвращено к версии {version_id}.",
     )
 
 
+@require_staff
+async def cache_stats(update: Update, _):
+    await update.message.reply_text(
+        f"🗄️ <b>Кэш расписаний:</b>\n\n"
+        f"▪️ {schedule_text_cache.to_text()}\n\n"
+        f"<b>👤 Кэш пользователей:</b>\n\n"
+        f"▪️ {user_cache.to_text()}",
+        parse_mode=ParseMode.HTML,
+    )
+
+
+@require_staff
+async def sql_trace(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if context.args and context.args[0] not in ("on", "off"):
+        await update.message.reply_text(
+            "❗ Использование: /sql_trace [on|off].",
+        )
+        return
+    if context.args:
+        sql_tracer.enabled = context.args[0] == "on"
+    else:
+        sql_tracer.enabled = not sql_tracer.enabled
+    logger.info(sql_tracer.to_text())
+    await update.message.reply_text(f"🔎 {sql_tracer.to_text()}")
+
+
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
     logger.error(
         "Exception while handling an update:",
@@ -112,9 +348,10 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
         f"<pre>{html.escape(tb_string)}</pre>"
     )
 
-    admin_user = session.execute(
+    await session.rollback()
+    admin_user = (await session.execute(
         select(User).filter_by(status=UserStatus.ADMIN),
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
     if admin_user:
         await context.bot.send_message(
             chat_id=admin_user.id,
@@ -130,8 +367,11 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
 
 
 message_handler = CommandHandler("message", message)
+cache_stats_handler = CommandHandler("cache_stats", cache_stats)
+rollback_schedules_handler = CommandHandler("rollback_schedules", rollback_schedules)
 users_list_handler = CommandHandler("users_list", users_list)
 users_stats_handler = CommandHandler("users_stats", users_stats)
+sql_trace_handler = CommandHandler("sql_trace", sql_trace)
 turn_off_daily_notify_handler = CommandHandler(
     "turn_off_daily_notify",
     turn_off_daily_notify,
@@ -142,9 +382,12 @@ delete_all_schedules_handler = CommandHandler(
 )
 
 __all__ = [
+    "cache_stats_handler",
     "delete_all_schedules_handler",
     "error_handler",
     "message_handler",
+    "rollback_schedules_handler",
+    "sql_trace_handler",
     "turn_off_daily_notify_handler",
     "users_list_handler",
     "users_stats_handler",
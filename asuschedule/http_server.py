@@ -0,0 +1,78 @@
+import asyncio
+from dataclasses import dataclass
+
+
+REQUEST_TIMEOUT = 10.0
+MAX_HEADER_LINES = 100
+
+
+class HttpError(Exception):
+    def __init__(self, status: str):
+        super().__init__(status)
+        self.status = status
+
+
+@dataclass
+class HttpRequest:
+    method: str
+    path: str
+    headers: dict[str, str]
+    body: bytes
+
+
+async def _read_request(reader: asyncio.StreamReader, max_body: int) -> HttpRequest:
+    parts = (await reader.readline()).decode("latin-1").split()
+    if len(parts) < 2:
+        raise HttpError("400 Bad Request")
+
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = (await reader.readline()).decode("latin-1")
+        if line in ("\r\n", "\n", ""):
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HttpError("431 Request Header Fields Too Large")
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError("400 Bad Request") from None
+    if length > max_body:
+        raise HttpError("413 Content Too Large")
+    body = await reader.readexactly(length) if length else b""
+    return HttpRequest(parts[0], parts[1].split("?", 1)[0], headers, body)
+
+
+async def read_request(
+        reader: asyncio.StreamReader,
+        max_body: int = 0,
+) -> HttpRequest:
+    try:
+        return await asyncio.wait_for(_read_request(reader, max_body), REQUEST_TIMEOUT)
+    except (asyncio.IncompleteReadError, TimeoutError):
+        raise HttpError("408 Request Timeout") from None
+
+
+async def write_response(
+        writer: asyncio.StreamWriter,
+        status: str,
+        body: bytes = b"",
+        content_type: str = "text/plain; charset=utf-8",
+) -> None:
+    writer.write(
+        f"HTTP/1.1 {status}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n".encode("latin-1") + body,
+    )
+    await writer.drain()
+
+
+__all__ = [
+    "HttpError",
+    "HttpRequest",
+    "read_request",
+    "write_response",
+]
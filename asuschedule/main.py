@@ -1,40 +1,78 @@
+import asyncio
 import datetime
 import logging
 from pathlib import Path
 
-from sqlalchemy import select
 from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import (
     Application,
+    ApplicationBuilder,
     CommandHandler,
     ContextTypes,
     filters,
     MessageHandler,
 )
 
-from config import BOT_TOKEN
+from config import (
+    BOT_TOKEN,
+    CONCURRENT_UPDATES,
+    ENABLE_METRICS,
+    METRICS_HOST,
+    METRICS_PORT,
+    UPDATE_QUEUE_SIZE,
+    USE_BROADCAST_WORKER,
+    USE_SCHEDULE_INDEX,
+    USE_WEBHOOK,
+)
 from consts import LESSON_TIMES, TIMEZONE
-from database import session
+from database import async_engine, engine, with_session_scope
 from handlers import (
+    cache_stats_handler,
+    chat_member_handler,
     notify_time_handler,
     delete_all_schedules_handler,
     handle_file,
     message_handler,
     registration_handler,
+    rollback_schedules_handler,
     schedule_table_handler,
+    sql_trace_handler,
     turn_off_daily_notify_handler,
     users_list_handler,
     users_stats_handler,
     error_handler,
 )
+from metrics import instrument_application, instrument_engine, start_metrics_server
 from models import User
+from outbox import broadcast_messages
+
+from schedules.broadcast import prepare_daily_broadcast
+from schedules.catalog import load_group_catalog, load_teacher_catalog
+from schedules.index import load_schedule_index
+from schedules.notify_plan import notification_plan
+from schedules.schedules_text import get_cached_schedule_text
+from schedules.teachers import sync_teacher_links
+from schedules.versions import get_active_version_id
+from sql_trace import install_sql_trace, trace_job
+from users import sync_unreachable
+from utils import (
+    get_main_keyboard,
+    is_even_week,
+    require_registration,
+    SessionUpdateProcessor,
+)
+from webhook import run_webhook
 
-from schedules.schedules_text import get_next_lesson_text, get_schedule_text
-from schedules.schedules import get_schedules
-from utils import get_main_keyboard, is_even_week, require_registration
+__all__ = [
+    "build_application",
+    "daily_schedule_handler",
+    "next_lesson_handler",
+    "notification_plan_handler",
+    "reachability_sync_handler",
+]
 
-__all__ = []
+REACHABILITY_SYNC_INTERVAL = 60
 
 Path("logs").mkdir(exist_ok=True)
 logging.basicConfig(
@@ -53,22 +91,18 @@ logger = logging.getLogger(__name__)
 
 
 @require_registration
-async def info_handler(update: Update, _) -> None:
-    user = session.get(User, update.effective_user.id)
-
+async def info_handler(update: Update, _, user: User) -> None:
     await update.message.reply_text(
         user.to_text(),
     )
 
 
 @require_registration
-async def schedule_handler(update: Update, _) -> None:
-    user = session.get(User, update.effective_user.id)
-
+async def schedule_handler(update: Update, _, user: User) -> None:
     date = datetime.datetime.now(tz=TIMEZONE)
-    schedules = get_schedules(user, date.weekday(), is_even_week(date))
-
-    schedule_text = get_schedule_text(user, schedules, date)
+    schedule_text = await get_cached_schedule_text(
+        user, date.weekday(), is_even_week(date),
+    )
     await update.message.reply_text(
         schedule_text,
         parse_mode=ParseMode.HTML,
@@ -77,13 +111,11 @@ async def schedule_handler(update: Update, _) -> None:
 
 
 @require_registration
-async def next_day_schedule_handler(update: Update, _) -> None:
-    user = session.get(User, update.effective_user.id)
-
+async def next_day_schedule_handler(update: Update, _, user: User) -> None:
     date = datetime.datetime.now(tz=TIMEZONE) + datetime.timedelta(days=1)
-    schedules = get_schedules(user, date.weekday(), is_even_week(date))
-
-    schedule_text = get_schedule_text(user, schedules, date)
+    schedule_text = await get_cached_schedule_text(
+        user, date.weekday(), is_even_week(date),
+    )
     await update.message.reply_text(
         schedule_text,
         parse_mode=ParseMode.HTML,
@@ -91,56 +123,102 @@ async def next_day_schedule_handler(update: Update, _) -> None:
     )
 
 
+@trace_job
+@with_session_scope
 async def next_lesson_handler(context: ContextTypes.DEFAULT_TYPE):
     lesson_num = context.job.data["lesson_num"]
     date = datetime.datetime.now(tz=TIMEZONE)
+    expires_at = None
+    if lesson_num + 1 in LESSON_TIMES:
+        hour, minute = [int(i) for i in LESSON_TIMES[lesson_num + 1][0].split(":")]
+        expires_at = date.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+    result = await broadcast_messages(
+        context.bot,
+        await notification_plan.get_messages(lesson_num + 1, date),
+        f"next_lesson_{lesson_num + 1}",
+        parse_mode=ParseMode.HTML,
+        expires_at=expires_at,
+    )
+    logger.info(f"Уведомления о паре {lesson_num + 1}: {result}")
 
-    users = session.execute(
-        select(User).filter_by(daily_notify=True),
-    ).scalars().all()
-    for user in users:
-        schedules = get_schedules(
-            user, date.weekday(),
-            is_even_week(date),
-            lesson_number=lesson_num + 1,
-        )
-        if not schedules:
-            continue
-        schedule_text = get_next_lesson_text(user, schedules[0])
-        await context.bot.send_message(
-            chat_id=user.id,
-            text=schedule_text,
-            parse_mode=ParseMode.HTML,
-        )
 
+@trace_job
+@with_session_scope
+async def notification_plan_handler(_context: ContextTypes.DEFAULT_TYPE) -> None:
+    await notification_plan.rebuild()
 
+
+@trace_job
+@with_session_scope
 async def daily_schedule_handler(context: ContextTypes.DEFAULT_TYPE) -> None:
     notify_time = context.job.data["notify_time"]
 
-    users = session.execute(
-        select(User).filter_by(
-            daily_notify=True,
-            notify_time=notify_time,
-        ),
-    ).scalars().all()
     date = (
         datetime.datetime.now(tz=TIMEZONE) + datetime.timedelta(days=1)
         if notify_time == 20 else datetime.datetime.now(tz=TIMEZONE)
     )
-    for user in users:
-        schedules = get_schedules(user, date.weekday(), is_even_week(date))
-        schedule_text = get_schedule_text(user, schedules, date)
-        await context.bot.send_message(
-            chat_id=user.id,
-            text=schedule_text,
-            parse_mode=ParseMode.HTML,
+    messages, stats = await prepare_daily_broadcast(notify_time, date)
+    logger.info(f"Ежедневная рассылка ({notify_time}:00): {stats.to_text()}")
+    result = await broadcast_messages(
+        context.bot,
+        messages,
+        f"daily_{notify_time}",
+        parse_mode=ParseMode.HTML,
+    )
+    logger.info(f"Ежедневная рассылка ({notify_time}:00): {result}")
+
+
+@trace_job
+@with_session_scope
+async def reachability_sync_handler(context: ContextTypes.DEFAULT_TYPE) -> None:
+    context.job.data["since"] = await sync_unreachable(context.job.data["since"])
+
+
+async def post_init(application: Application) -> None:
+    if ENABLE_METRICS:
+        application.bot_data["metrics_server"] = await start_metrics_server(
+            METRICS_HOST, METRICS_PORT,
         )
 
 
-def main() -> None:
-    application = Application.builder().token(BOT_TOKEN).build()
+async def post_shutdown(application: Application) -> None:
+    metrics_server = application.bot_data.get("metrics_server")
+    if metrics_server:
+        metrics_server.close()
+        await metrics_server.wait_closed()
+
+
+def build_application(builder: ApplicationBuilder) -> Application:
+    sync_teacher_links()
+    if USE_SCHEDULE_INDEX:
+        load_schedule_index()
+    load_group_catalog()
+    load_teacher_catalog()
+
+    get_active_version_id()
+
+    application = builder.concurrent_updates(
+        SessionUpdateProcessor(CONCURRENT_UPDATES),
+    ).post_init(post_init).post_shutdown(post_shutdown).build()
 
     job_queue = application.job_queue
+    job_queue.run_once(notification_plan_handler, 0, name="notification_plan_startup")
+    job_queue.run_daily(
+        notification_plan_handler,
+        datetime.time(
+            hour=0,
+            tzinfo=TIMEZONE,
+        ),
+        name="notification_plan",
+    )
+    if USE_BROADCAST_WORKER:
+        job_queue.run_repeating(
+            reachability_sync_handler,
+            REACHABILITY_SYNC_INTERVAL,
+            data={"since": datetime.datetime.now(tz=TIMEZONE).replace(tzinfo=None)},
+            name="reachability_sync",
+        )
     job_queue.run_daily(
         daily_schedule_handler,
         datetime.time(
@@ -199,15 +277,37 @@ def main() -> None:
     application.add_handler(message_handler)
     application.add_handler(users_list_handler)
     application.add_handler(users_stats_handler)
+    application.add_handler(cache_stats_handler)
     application.add_handler(turn_off_daily_notify_handler)
     application.add_handler(delete_all_schedules_handler)
+    application.add_handler(rollback_schedules_handler)
+    application.add_handler(sql_trace_handler)
     application.add_error_handler(error_handler)
     application.add_handler(MessageHandler(filters.Document.ALL, handle_file))
 
     application.add_handler(registration_handler)
     application.add_handler(schedule_table_handler)
     application.add_handler(notify_time_handler)
-    application.run_polling()
+    application.add_handler(chat_member_handler)
+
+    install_sql_trace(engine)
+    install_sql_trace(async_engine.sync_engine)
+    if ENABLE_METRICS:
+        instrument_engine(engine, "sync")
+        instrument_engine(async_engine.sync_engine, "async")
+        instrument_application(application)
+    return application
+
+
+def main() -> None:
+    builder = Application.builder().token(BOT_TOKEN)
+    if not USE_WEBHOOK:
+        build_application(builder).run_polling()
+        return
+    application = build_application(
+        builder.updater(None).update_queue(asyncio.Queue(UPDATE_QUEUE_SIZE)),
+    )
+    asyncio.run(run_webhook(application))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,302 @@
+import asyncio
+import datetime
+import logging
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from functools import wraps
+from threading import Lock
+
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_SUBMITTED,
+    JobExecutionEvent,
+    JobSubmissionEvent,
+)
+from sqlalchemy import Engine, event
+from telegram.ext import Application, BaseHandler, ConversationHandler
+
+from http_server import HttpError, read_request, write_response
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+JOB_BUCKETS = (0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple[tuple[str, object], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+registry = []
+
+
+class Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = Lock()
+        registry.append(self)
+
+    @abstractmethod
+    def _samples(self) -> list[str]:
+        pass
+
+    def render(self) -> str:
+        with self._lock:
+            samples = self._samples()
+        return "\n".join([
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *samples,
+        ])
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self.values = {}
+
+    def inc(self, value: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(labels)} {value}"
+            for labels, value in self.values.items()
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation)
+        self.buckets = buckets
+        self.values = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            if key not in self.values:
+                self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts, _, _ = state = self.values[key]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                counts[index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> list[str]:
+        samples = []
+        for labels, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bucket, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append(
+                    f"{self.name}_bucket"
+                    f"{_format_labels((*labels, ('le', bucket)))} {cumulative}",
+                )
+            samples.extend([
+                f"{self.name}_bucket{_format_labels((*labels, ('le', '+Inf')))} {count}",
+                f"{self.name}_sum{_format_labels(labels)} {total}",
+                f"{self.name}_count{_format_labels(labels)} {count}",
+            ])
+        return samples
+
+
+handler_duration = Histogram(
+    "asuschedule_handler_duration_seconds",
+    "Время выполнения обработчиков обновлений.",
+)
+handler_errors = Counter(
+    "asuschedule_handler_errors_total",
+    "Исключения в обработчиках обновлений.",
+)
+db_queries = Counter(
+    "asuschedule_db_queries_total",
+    "Количество SQL-запросов.",
+)
+db_query_duration = Histogram(
+    "asuschedule_db_query_duration_seconds",
+    "Время выполнения SQL-запросов.",
+    DB_BUCKETS,
+)
+job_lateness = Histogram(
+    "asuschedule_job_lateness_seconds",
+    "Задержка запуска задач JobQueue относительно расписания.",
+    JOB_BUCKETS,
+)
+job_duration = Histogram(
+    "asuschedule_job_duration_seconds",
+    "Время выполнения задач JobQueue.",
+    JOB_BUCKETS,
+)
+messages_sent = Counter(
+    "asuschedule_messages_sent_total",
+    "Успешно отправленные сообщения.",
+)
+send_errors = Counter(
+    "asuschedule_send_errors_total",
+    "Ошибки отправки сообщений по типу.",
+)
+send_retries = Counter(
+    "asuschedule_send_retries_total",
+    "Повторные попытки отправки сообщений.",
+)
+
+
+def render_metrics() -> str:
+    return "\n".join(metric.render() for metric in registry) + "\n"
+
+
+def _before_cursor_execute(conn, *_args) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _handle_error(context) -> None:
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    def after_cursor_execute(conn, *_args) -> None:
+        started = conn.info["query_started"].pop()
+        db_queries.inc(engine=name)
+        db_query_duration.observe(time.perf_counter() - started, engine=name)
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _instrument_callback(handler: BaseHandler) -> None:
+    callback = handler.callback
+    name = f"{callback.__module__.rsplit('.', 1)[-1]}.{callback.__name__}"
+
+    @wraps(callback)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await callback(*args, **kwargs)
+        except Exception:
+            handler_errors.inc(handler=name)
+            raise
+        finally:
+            handler_duration.observe(time.perf_counter() - started, handler=name)
+
+    handler.callback = wrapper
+
+
+def _iter_handlers(handlers: list[BaseHandler]):
+    for handler in handlers:
+        if isinstance(handler, ConversationHandler):
+            yield from _iter_handlers(handler.entry_points)
+            for state_handlers in handler.states.values():
+                yield from _iter_handlers(state_handlers)
+            yield from _iter_handlers(handler.fallbacks)
+        else:
+            yield handler
+
+
+def _instrument_jobs(application: Application) -> None:
+    scheduler = application.job_queue.scheduler
+    started = {}
+
+    def get_job_name(job_id: str) -> str:
+        job = scheduler.get_job(job_id)
+        return job.name if job else job_id
+
+    def on_submitted(job_event: JobSubmissionEvent) -> None:
+        now = datetime.datetime.now(datetime.UTC)
+        name = get_job_name(job_event.job_id)
+        for run_time in job_event.scheduled_run_times:
+            job_lateness.observe(
+                max((now - run_time).total_seconds(), 0.0),
+                job=name,
+            )
+            started[(job_event.job_id, run_time)] = (name, time.perf_counter())
+
+    def on_executed(job_event: JobExecutionEvent) -> None:
+        name, job_started = started.pop(
+            (job_event.job_id, job_event.scheduled_run_time),
+            (job_event.job_id, None),
+        )
+        if job_started is not None:
+            job_duration.observe(time.perf_counter() - job_started, job=name)
+
+    scheduler.add_listener(on_submitted, EVENT_JOB_SUBMITTED)
+    scheduler.add_listener(on_executed, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+
+
+def instrument_application(application: Application) -> None:
+    for handlers in application.handlers.values():
+        for handler in _iter_handlers(handlers):
+            _instrument_callback(handler)
+    if application.job_queue:
+        _instrument_jobs(application)
+
+
+async def _handle_request(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+) -> None:
+    try:
+        request = await read_request(reader)
+        if request.method == "GET" and request.path == "/metrics":
+            await write_response(
+                writer,
+                "200 OK",
+                render_metrics().encode("utf-8"),
+                "text/plain; version=0.0.4; charset=utf-8",
+            )
+        else:
+            await write_response(writer, "404 Not Found", b"not found\n")
+    except HttpError as e:
+        await write_response(writer, e.status)
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host: str, port: int) -> asyncio.Server:
+    logger.info(f"Метрики доступны на http://{host}:{port}/metrics")
+    return await asyncio.start_server(_handle_request, host, port)
+
+
+__all__ = [
+    "Counter",
+    "db_queries",
+    "db_query_duration",
+    "handler_duration",
+    "handler_errors",
+    "Histogram",
+    "instrument_application",
+    "instrument_engine",
+    "job_duration",
+    "job_lateness",
+    "messages_sent",
+    "render_metrics",
+    "send_errors",
+    "send_retries",
+    "start_metrics_server",
+]
@@ -0,0 +1,91 @@
+import datetime
+import logging
+
+from sqlalchemy import Connection, Engine, func, insert, inspect, select, text, update
+
+from consts import TIMEZONE
+from models import Schedule, schedule_teachers, ScheduleVersion, User
+
+
+logger = logging.getLogger(__name__)
+
+
+def _add_schedule_versions(connection: Connection) -> None:
+    columns = {
+        column["name"] for column in inspect(connection).get_columns("schedules")
+    }
+    if "version_id" in columns:
+        return
+    connection.execute(text(
+        "ALTER TABLE schedules ADD COLUMN version_id INTEGER "
+        "REFERENCES schedule_versions (id)",
+    ))
+    row_count = connection.execute(select(func.count(Schedule.id))).scalar()
+    if not row_count:
+        return
+    now = datetime.datetime.now(tz=TIMEZONE)
+    version_id = connection.execute(
+        insert(ScheduleVersion).values(
+            created_at=now,
+            published_at=now,
+            row_count=row_count,
+            is_active=True,
+        ),
+    ).inserted_primary_key[0]
+    connection.execute(update(Schedule).values(version_id=version_id))
+
+
+def _add_lookup_indexes(connection: Connection) -> None:
+    connection.execute(text("DROP INDEX IF EXISTS ix_schedules_version_id"))
+    for table in (Schedule.__table__, schedule_teachers, User.__table__):
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def _add_user_reachability(connection: Connection) -> None:
+    columns = {
+        column["name"] for column in inspect(connection).get_columns("users")
+    }
+    if "unreachable_since" not in columns:
+        connection.execute(text(
+            "ALTER TABLE users ADD COLUMN unreachable_since DATETIME",
+        ))
+    if "send_error" not in columns:
+        connection.execute(text("ALTER TABLE users ADD COLUMN send_error VARCHAR"))
+
+
+def _add_outbox_expiry(connection: Connection) -> None:
+    columns = {
+        column["name"]
+        for column in inspect(connection).get_columns("outbox_messages")
+    }
+    if "expires_at" not in columns:
+        connection.execute(text(
+            "ALTER TABLE outbox_messages ADD COLUMN expires_at DATETIME",
+        ))
+
+
+MIGRATIONS = [
+    _add_schedule_versions,
+    _add_lookup_indexes,
+    _add_user_reachability,
+    _add_outbox_expiry,
+]
+
+
+def migrate(engine: Engine) -> None:
+    with engine.begin() as connection:
+        schema_version = connection.execute(text("PRAGMA user_version")).scalar()
+        for number, migration in enumerate(
+                MIGRATIONS[schema_version:],
+                start=schema_version + 1,
+        ):
+            migration(connection)
+            connection.execute(text(f"PRAGMA user_version = {number}"))
+            logger.info(f"Применена миграция {number}: {migration.__name__}")
+
+
+__all__ = [
+    "migrate",
+    "MIGRATIONS",
+]
@@ -1,8 +1,18 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Enum
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+)
 from sqlalchemy.orm import declarative_base, relationship
 
 from consts import LESSON_TIMES
-from enums import UserRole, UserStatus
+from enums import OutboxStatus, UserRole, UserStatus
 
 Base = declarative_base()
 
@@ -24,6 +34,9 @@ class Group(Base):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_daily_notify_notify_time", "daily_notify", "notify_time"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     username = Column(String, nullable=True)
@@ -35,8 +48,10 @@ class User(Base):
     daily_notify = Column(Boolean, default=False, nullable=True)
     notify_time = Column(Integer, default=8, nullable=False)  # Время рассылки (8 или 20)
     teacher_name = Column(String, nullable=True)
+    unreachable_since = Column(DateTime, nullable=True)  # Бот заблокирован
+    send_error = Column(String, nullable=True)
 
-    group = relationship("Group", back_populates="users")
+    group = relationship("Group", back_populates="users", lazy="joined")
 
     def make_teacher(self, teacher_name: str) -> None:
         self.subgroup = None
@@ -88,8 +103,52 @@ class User(Base):
         )
 
 
+class ScheduleVersion(Base):
+    __tablename__ = "schedule_versions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime, nullable=False)
+    row_count = Column(Integer, default=0, nullable=False)
+    published_at = Column(DateTime, nullable=True)
+    is_active = Column(Boolean, default=False, nullable=False)
+
+
+schedule_teachers = Table(
+    "schedule_teachers",
+    Base.metadata,
+    Column("teacher_id", Integer, ForeignKey("teachers.id"), primary_key=True),
+    Column("schedule_id", Integer, ForeignKey("schedules.id"), primary_key=True),
+    Index("ix_schedule_teachers_schedule_id", "schedule_id"),
+)
+
+
+class Teacher(Base):
+    __tablename__ = "teachers"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String, nullable=False)
+    normalized_name = Column(String, nullable=False, unique=True, index=True)
+
+
 class Schedule(Base):
     __tablename__ = "schedules"
+    __table_args__ = (
+        Index(
+            "ix_schedules_group_lookup",
+            "version_id",
+            "group_id",
+            "is_even_week",
+            "day_of_week",
+            "lesson_number",
+        ),
+        Index(
+            "ix_schedules_day_lookup",
+            "version_id",
+            "is_even_week",
+            "day_of_week",
+            "lesson_number",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     day_of_week = Column(Integer, nullable=False)
@@ -102,8 +161,10 @@ class Schedule(Base):
     lesson_type = Column(String, nullable=True)
     # 0: черная, 1: красная
     is_even_week = Column(Boolean, nullable=False)
+    version_id = Column(Integer, ForeignKey("schedule_versions.id"))
 
     group = relationship("Group", back_populates="schedules")
+    teachers = relationship("Teacher", secondary=schedule_teachers)
 
     def to_text(self, requesting_role: UserRole) -> str:
         start_time, end_time = LESSON_TIMES.get(self.lesson_number, ("-", "-"))
@@ -127,6 +188,25 @@ class Schedule(Base):
         )
 
 
+class OutboxMessage(Base):
+    __tablename__ = "outbox_messages"
+    __table_args__ = (
+        Index("ix_outbox_messages_status_id", "status", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chat_id = Column(Integer, nullable=False)
+    text = Column(String, nullable=False)
+    parse_mode = Column(String, nullable=True)
+    broadcast = Column(String, nullable=False)
+    status = Column(Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+
+
 Group.users = relationship("User", order_by=User.id, back_populates="group")
 Group.schedules = relationship("Schedule", order_by=Schedule.id, back_populates="group")
 
@@ -134,6 +214,10 @@ Group.schedules = relationship("Schedule", order_by=Schedule.id, back_populates=
 __all__ = [
     "Base",
     "Group",
+    "OutboxMessage",
     "Schedule",
+    "schedule_teachers",
+    "ScheduleVersion",
+    "Teacher",
     "User",
 ]
@@ -0,0 +1,198 @@
+import asyncio
+import datetime
+import logging
+import time
+from collections.abc import Iterable
+from itertools import groupby
+
+from sqlalchemy import delete, func, insert, select, update
+from telegram import Bot
+from telegram.error import BadRequest, NetworkError, RetryAfter, TelegramError
+
+from config import USE_BROADCAST_WORKER
+from consts import TIMEZONE
+from database import AsyncSession, session
+from enums import OutboxStatus
+from models import OutboxMessage, User
+from sender import send_pipeline, SendPipeline
+from users import collect_unreachable, mark_unreachable
+
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 500
+OUTBOX_POLL_INTERVAL = 1.0
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETENTION = datetime.timedelta(days=7)
+OUTBOX_CLEANUP_INTERVAL = 60 * 60
+
+
+async def enqueue_messages(
+        messages: Iterable[tuple[int, str]],
+        parse_mode: str | None,
+        broadcast: str,
+        expires_at: datetime.datetime = None,
+) -> int:
+    now = datetime.datetime.now(tz=TIMEZONE)
+    unreachable = set((await session.execute(
+        select(User.id).where(User.unreachable_since.isnot(None)),
+    )).scalars())
+    rows = [
+        {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": parse_mode,
+            "broadcast": broadcast,
+            "created_at": now,
+            "expires_at": expires_at,
+        }
+        for chat_id, text in messages if chat_id not in unreachable
+    ]
+    if rows:
+        await session.execute(insert(OutboxMessage), rows)
+        await session.commit()
+    return len(rows)
+
+
+async def broadcast_messages(
+        bot: Bot,
+        messages: Iterable[tuple[int, str]],
+        broadcast: str,
+        parse_mode: str = None,
+        expires_at: datetime.datetime = None,
+) -> str:
+    if USE_BROADCAST_WORKER:
+        count = await enqueue_messages(messages, parse_mode, broadcast, expires_at)
+        return f"поставлено в очередь {count}"
+    messages = list(messages)
+    send_errors = {}
+    report = await send_pipeline.send(
+        bot,
+        messages,
+        parse_mode=parse_mode,
+        on_result=collect_unreachable(messages, send_errors),
+    )
+    pruned = await mark_unreachable(send_errors)
+    return f"{report.to_text()}, исключено недоступных {pruned}"
+
+
+def is_retryable(error: TelegramError) -> bool:
+    return (
+        isinstance(error, (NetworkError, RetryAfter))
+        and not isinstance(error, BadRequest)
+    )
+
+
+class OutboxWorker:
+    def __init__(self, bot: Bot, shard: int, shards: int, pipeline: SendPipeline):
+        self.bot = bot
+        self.shard = shard
+        self.shards = shards
+        self.pipeline = pipeline
+        self.last_cleanup = 0.0
+
+    def _in_shard(self):
+        return func.abs(OutboxMessage.chat_id) % self.shards == self.shard
+
+    async def _expire(self) -> None:
+        async with AsyncSession.begin() as db_session:
+            result = await db_session.execute(
+                update(OutboxMessage).where(
+                    OutboxMessage.status == OutboxStatus.PENDING,
+                    OutboxMessage.expires_at < datetime.datetime.now(tz=TIMEZONE),
+                    self._in_shard(),
+                ).values(status=OutboxStatus.EXPIRED),
+            )
+        if result.rowcount:
+            logger.info(
+                f"Шард {self.shard}/{self.shards}: "
+                f"просрочено сообщений {result.rowcount}",
+            )
+
+    async def _fetch_batch(self) -> list[OutboxMessage]:
+        await self._expire()
+        async with AsyncSession() as db_session:
+            return (await db_session.execute(
+                select(OutboxMessage).where(
+                    OutboxMessage.status == OutboxStatus.PENDING,
+                    self._in_shard(),
+                ).order_by(
+                    OutboxMessage.id,
+                ).limit(OUTBOX_BATCH_SIZE),
+            )).scalars().all()
+
+    async def _mark(self, message: OutboxMessage, error: TelegramError | None) -> None:
+        values = {"attempts": message.attempts + 1, "error": None}
+        if error is None:
+            values.update(
+                status=OutboxStatus.SENT,
+                sent_at=datetime.datetime.now(tz=TIMEZONE),
+            )
+        else:
+            values["error"] = type(error).__name__
+            if not is_retryable(error) or values["attempts"] >= OUTBOX_MAX_ATTEMPTS:
+                values["status"] = OutboxStatus.FAILED
+        async with AsyncSession.begin() as db_session:
+            await db_session.execute(
+                update(OutboxMessage).filter_by(id=message.id).values(**values),
+            )
+
+    async def drain(self) -> int:
+        messages = await self._fetch_batch()
+        for parse_mode, group in groupby(
+                sorted(messages, key=lambda message: message.parse_mode or ""),
+                key=lambda message: message.parse_mode,
+        ):
+            group = list(group)
+            group_messages = [(message.chat_id, message.text) for message in group]
+            send_errors = {}
+            collect = collect_unreachable(group_messages, send_errors)
+
+            async def on_result(index: int, error: TelegramError | None) -> None:
+                await self._mark(group[index], error)
+                await collect(index, error)
+
+            report = await self.pipeline.send(
+                self.bot,
+                group_messages,
+                parse_mode=parse_mode,
+                on_result=on_result,
+            )
+            pruned = await mark_unreachable(send_errors)
+            logger.info(
+                f"Шард {self.shard}/{self.shards}: {report.to_text()}, "
+                f"исключено недоступных {pruned}",
+            )
+        return len(messages)
+
+    async def cleanup(self) -> None:
+        threshold = datetime.datetime.now(tz=TIMEZONE) - OUTBOX_RETENTION
+        async with AsyncSession.begin() as db_session:
+            result = await db_session.execute(
+                delete(OutboxMessage).where(
+                    OutboxMessage.status != OutboxStatus.PENDING,
+                    OutboxMessage.created_at < threshold,
+                ),
+            )
+        self.last_cleanup = time.monotonic()
+        logger.info(f"Очистка очереди рассылок: удалено {result.rowcount}")
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        logger.info(f"Обработчик рассылок запущен: шард {self.shard}/{self.shards}")
+        while not stop_event.is_set():
+            if time.monotonic() - self.last_cleanup > OUTBOX_CLEANUP_INTERVAL:
+                await self.cleanup()
+            if await self.drain():
+                continue
+            try:
+                await asyncio.wait_for(stop_event.wait(), OUTBOX_POLL_INTERVAL)
+            except TimeoutError:
+                pass
+
+
+__all__ = [
+    "broadcast_messages",
+    "enqueue_messages",
+    "is_retryable",
+    "OutboxWorker",
+]
@@ -0,0 +1,118 @@
+import datetime
+from collections import defaultdict
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from config import USE_SCHEDULE_INDEX
+from database import count_context_queries, session
+from enums import UserRole
+from models import Schedule, User
+from schedules.index import get_schedule_index
+from schedules.schedules_text import get_schedule_text
+from schedules.versions import get_active_version_id
+from utils import is_even_week, normalize_teacher_name, split_teacher_names
+
+
+@dataclass
+class BroadcastStats:
+    recipients: int = 0
+    queries: int = 0
+    renders: int = 0
+
+    def to_text(self) -> str:
+        return (
+            f"получателей {self.recipients}, "
+            f"запросов к БД {self.queries}, "
+            f"отрисовок {self.renders}"
+        )
+
+
+async def get_day_schedules(
+        weekday: int,
+        even_week: bool,
+        lesson_number: int = None,
+) -> list[Schedule]:
+    if USE_SCHEDULE_INDEX:
+        return get_schedule_index().get_day_schedules(
+            weekday, even_week, lesson_number,
+        )
+    stmt = select(Schedule).options(
+        joinedload(Schedule.group),
+    ).filter_by(
+        version_id=get_active_version_id(),
+        is_even_week=even_week,
+        day_of_week=weekday,
+    )
+    if lesson_number is not None:
+        stmt = stmt.filter_by(lesson_number=lesson_number)
+    stmt = stmt.order_by(Schedule.lesson_number, Schedule.id)
+    return (await session.execute(stmt)).scalars().all()
+
+
+def get_recipient_key(user: User) -> tuple:
+    if user.role == UserRole.TEACHER:
+        return UserRole.TEACHER, user.teacher_name
+    return UserRole.STUDENT, user.group_id, user.subgroup
+
+
+class DaySchedules:
+    def __init__(self, schedules: list[Schedule]):
+        self.schedules = schedules
+        self.by_group = defaultdict(list)
+        self.by_teacher = defaultdict(list)
+        for schedule in schedules:
+            self.by_group[schedule.group_id].append(schedule)
+            for teacher_name in split_teacher_names(schedule.teacher):
+                self.by_teacher[normalize_teacher_name(teacher_name)].append(schedule)
+
+    def for_user(self, user: User) -> list[Schedule]:
+        if user.role == UserRole.TEACHER:
+            return self.by_teacher[normalize_teacher_name(user.teacher_name)]
+        return [
+            schedule for schedule in self.by_group[user.group_id]
+            if schedule.subgroup is None or schedule.subgroup == user.subgroup
+        ]
+
+
+async def prepare_daily_broadcast(
+        notify_time: int,
+        date: datetime.datetime,
+) -> tuple[list[tuple[int, str]], BroadcastStats]:
+    stats = BroadcastStats()
+    with count_context_queries() as queries:
+        users = (await session.execute(
+            select(User).filter_by(
+                daily_notify=True,
+                notify_time=notify_time,
+                unreachable_since=None,
+            ),
+        )).scalars().all()
+        day_schedules = DaySchedules(
+            await get_day_schedules(date.weekday(), is_even_week(date)),
+        )
+
+    rendered = {}
+    messages = []
+    for user in users:
+        key = get_recipient_key(user)
+        if key not in rendered:
+            rendered[key] = get_schedule_text(
+                user, day_schedules.for_user(user), date,
+            )
+            stats.renders += 1
+        messages.append((user.id, rendered[key]))
+
+    stats.recipients = len(messages)
+    stats.queries = queries.count
+    return messages, stats
+
+
+__all__ = [
+    "BroadcastStats",
+    "DaySchedules",
+    "get_day_schedules",
+    "get_recipient_key",
+    "prepare_daily_broadcast",
+]
@@ -0,0 +1,121 @@
+import logging
+
+from sqlalchemy import select
+
+from database import Session
+from models import Group, Schedule, schedule_teachers, Teacher
+from schedules.versions import get_active_version_id
+from utils import normalize_teacher_name
+
+
+logger = logging.getLogger(__name__)
+
+
+def _first_group_id(subtree: dict | int) -> int:
+    while isinstance(subtree, dict):
+        subtree = next(iter(subtree.values()))
+    return subtree
+
+
+class GroupCatalog:
+    def __init__(self, groups: list[Group]):
+        self.groups = {group.id: group for group in groups}
+        self.tree = {}
+        for group in sorted(
+                groups,
+                key=lambda group: (group.faculty, group.course, group.speciality),
+        ):
+            self.tree.setdefault(group.faculty, {}).setdefault(
+                group.course, {},
+            )[group.speciality] = group.id
+
+    def get_group(self, group_id: int) -> Group | None:
+        return self.groups.get(group_id)
+
+    def get_faculties(self) -> list[tuple[int, str]]:
+        return [
+            (_first_group_id(courses), faculty)
+            for faculty, courses in self.tree.items()
+        ]
+
+    def get_courses(self, faculty: str) -> list[tuple[int, int]]:
+        return [
+            (_first_group_id(specialities), course)
+            for course, specialities in self.tree.get(faculty, {}).items()
+        ]
+
+    def get_specialities(self, faculty: str, course: int) -> list[tuple[int, str]]:
+        specialities = self.tree.get(faculty, {}).get(course, {})
+        return [
+            (group_id, speciality) for speciality, group_id in specialities.items()
+        ]
+
+
+class TeacherCatalog:
+    def __init__(self, teachers: list[tuple[int, str]]):
+        self.teachers = sorted(teachers, key=lambda teacher: teacher[1].casefold())
+        self._search_names = [
+            normalize_teacher_name(name) for _, name in self.teachers
+        ]
+
+    def search(self, text: str = "") -> list[tuple[int, str]]:
+        text = normalize_teacher_name(text)
+        if not text:
+            return self.teachers
+        return [
+            teacher
+            for teacher, name in zip(self.teachers, self._search_names)
+            if name.startswith(text)
+            or any(word.startswith(text) for word in name.replace("-", " ").split())
+        ]
+
+
+group_catalog = GroupCatalog([])
+teacher_catalog = TeacherCatalog([])
+
+
+def load_group_catalog() -> None:
+    global group_catalog
+
+    with Session() as catalog_session:
+        groups = catalog_session.execute(select(Group)).scalars().all()
+        group_catalog = GroupCatalog(groups)
+    logger.info(f"Каталог групп загружен: {len(groups)} групп")
+
+
+def get_group_catalog() -> GroupCatalog:
+    return group_catalog
+
+
+def load_teacher_catalog() -> None:
+    global teacher_catalog
+
+    with Session() as catalog_session:
+        teachers = catalog_session.execute(
+            select(
+                Teacher.id,
+                Teacher.name,
+            ).join(
+                schedule_teachers,
+            ).join(
+                Schedule,
+            ).filter_by(
+                version_id=get_active_version_id(),
+            ).distinct(),
+        ).all()
+    teacher_catalog = TeacherCatalog([tuple(teacher) for teacher in teachers])
+    logger.info(f"Каталог преподавателей загружен: {len(teachers)} преподавателей")
+
+
+def get_teacher_catalog() -> TeacherCatalog:
+    return teacher_catalog
+
+
+__all__ = [
+    "get_group_catalog",
+    "GroupCatalog",
+    "get_teacher_catalog",
+    "load_group_catalog",
+    "load_teacher_catalog",
+    "TeacherCatalog",
+]
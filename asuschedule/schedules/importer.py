@@ -0,0 +1,266 @@
+import logging
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import BinaryIO
+
+from openpyxl import load_workbook
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from models import Group, Schedule, schedule_teachers
+from schedules.teachers import TeacherResolver
+from schedules.versions import create_version, discard_version, publish_version
+
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = [
+    "course",
+    "speciality",
+    "subgroup",
+    "day_of_week",
+    "lesson_number",
+    "subject",
+    "teacher",
+    "room",
+    "lesson_type",
+    "is_even_week",
+    "faculty",
+]
+
+DAYS_OF_WEEK = {
+    "пн": 0,
+    "вт": 1,
+    "ср": 2,
+    "чт": 3,
+    "пт": 4,
+    "сб": 5,
+    "вс": 6,
+}
+
+PHASE_NAMES = {
+    "read": "чтение",
+    "groups": "группы",
+    "insert": "запись",
+    "commit": "фиксация",
+}
+
+BATCH_SIZE = 2000
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    new_groups: int = 0
+    new_teachers: int = 0
+    timings: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def elapsed(self) -> float:
+        return sum(self.timings.values())
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = (
+                self.timings.get(name, 0.0) + time.perf_counter() - started
+            )
+
+    def to_text(self) -> str:
+        phases = ", ".join(
+            f"{PHASE_NAMES.get(name, name)} {seconds:.2f} с"
+            for name, seconds in self.timings.items()
+        )
+        return (
+            f"Строк: {self.rows}, новых групп: {self.new_groups}, "
+            f"новых преподавателей: {self.new_teachers}.\n"
+            f"Время: {self.elapsed:.2f} с ({self.rows_per_second:.0f} строк/с); "
+            f"{phases}."
+        )
+
+
+def _to_optional_text(value) -> str | None:
+    return value if isinstance(value, str) else None
+
+
+def _to_room(value) -> str | None:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return str(int(value)) if float(value).is_integer() else str(value)
+    return None
+
+
+def convert_row(values: tuple) -> dict:
+    (
+        course,
+        speciality,
+        subgroup,
+        day_of_week,
+        lesson_number,
+        subject,
+        teacher,
+        room,
+        lesson_type,
+        is_even_week,
+        faculty,
+    ) = values
+
+    num_day_of_week = DAYS_OF_WEEK.get(str(day_of_week).strip().lower())
+    if num_day_of_week is None:
+        raise ValueError(f"Неизвестный день недели: {day_of_week}")
+
+    return {
+        "course": int(course),
+        "speciality": str(speciality),
+        "faculty": str(faculty),
+        "subgroup": int(subgroup) if isinstance(subgroup, (int, float)) else None,
+        "day_of_week": num_day_of_week,
+        "lesson_number": int(lesson_number),
+        "subject": subject,
+        "teacher": _to_optional_text(teacher),
+        "room": _to_room(room),
+        "lesson_type": _to_optional_text(lesson_type),
+        "is_even_week": bool(int(is_even_week)),
+    }
+
+
+def iter_schedule_rows(file: BinaryIO) -> Iterator[dict]:
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            for values in sheet.iter_rows(min_row=2, values_only=True):
+                values = (tuple(values) + (None,) * len(COLUMNS))[:len(COLUMNS)]
+                if all(value is None for value in values):
+                    continue
+                yield convert_row(values)
+    finally:
+        workbook.close()
+
+
+class GroupResolver:
+    def __init__(self, db_session: Session):
+        self.session = db_session
+        self.groups = {
+            (group.course, group.faculty, group.speciality): group
+            for group in db_session.execute(select(Group)).scalars()
+        }
+        self.created = 0
+
+    def resolve(self, course: int, faculty: str, speciality: str) -> Group:
+        key = (course, faculty, speciality)
+        if key not in self.groups:
+            group = Group(course=course, faculty=faculty, speciality=speciality)
+            self.groups[key] = group
+            self.session.add(group)
+            self.created += 1
+            logger.info(f"Добавлена новая группа {group.get_name()}")
+        return self.groups[key]
+
+
+def _insert_rows(
+        db_session: Session,
+        rows: Iterator[dict],
+        version_id: int,
+        group_resolver: GroupResolver,
+        teacher_resolver: TeacherResolver,
+        report: ImportReport,
+        on_progress: Callable[[int], None] = None,
+) -> None:
+    while True:
+        with report.phase("read"):
+            batch = list(islice(rows, BATCH_SIZE))
+        if not batch:
+            break
+
+        with report.phase("groups"):
+            groups = [
+                group_resolver.resolve(
+                    row.pop("course"), row.pop("faculty"), row.pop("speciality"),
+                )
+                for row in batch
+            ]
+            teachers = [teacher_resolver.resolve(row["teacher"]) for row in batch]
+            db_session.flush()
+
+        with report.phase("insert"):
+            for row, group in zip(batch, groups):
+                row["group_id"] = group.id
+                row["version_id"] = version_id
+            db_session.execute(
+                insert(Schedule).execution_options(render_nulls=True),
+                batch,
+            )
+            schedule_ids = db_session.execute(
+                select(Schedule.id).filter_by(
+                    version_id=version_id,
+                ).order_by(
+                    Schedule.id.desc(),
+                ).limit(len(batch)),
+            ).scalars().all()[::-1]
+            link_rows = [
+                {"schedule_id": schedule_id, "teacher_id": teacher.id}
+                for schedule_id, row_teachers in zip(schedule_ids, teachers)
+                for teacher in row_teachers
+            ]
+            if link_rows:
+                db_session.execute(insert(schedule_teachers), link_rows)
+
+        with report.phase("commit"):
+            db_session.commit()
+        report.rows += len(batch)
+        if on_progress:
+            on_progress(report.rows)
+
+
+def import_schedules(
+        db_session: Session,
+        file: BinaryIO,
+        on_progress: Callable[[int], None] = None,
+) -> ImportReport:
+    report = ImportReport()
+    group_resolver = GroupResolver(db_session)
+    teacher_resolver = TeacherResolver(db_session)
+    known_teachers = len(teacher_resolver.teachers)
+
+    version = create_version(db_session)
+    try:
+        _insert_rows(
+            db_session,
+            iter_schedule_rows(file),
+            version.id,
+            group_resolver,
+            teacher_resolver,
+            report,
+            on_progress,
+        )
+        version.row_count = report.rows
+        with report.phase("commit"):
+            publish_version(db_session, version.id)
+    except Exception:
+        discard_version(db_session, version.id)
+        raise
+
+    report.new_groups = group_resolver.created
+    report.new_teachers = len(teacher_resolver.teachers) - known_teachers
+    logger.info(f"Расписание загружено. {report.to_text()}")
+    return report
+
+
+__all__ = [
+    "convert_row",
+    "GroupResolver",
+    "import_schedules",
+    "ImportReport",
+    "iter_schedule_rows",
+]
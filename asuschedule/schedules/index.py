@@ -0,0 +1,103 @@
+import logging
+import time
+from collections import defaultdict
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from database import Session
+from enums import UserRole
+from models import Schedule, User
+from schedules.versions import get_active_version_id
+from utils import normalize_teacher_name, split_teacher_names
+
+
+logger = logging.getLogger(__name__)
+
+
+def _sort_key(schedule: Schedule) -> tuple[int, int]:
+    return schedule.lesson_number, schedule.id
+
+
+class ScheduleIndex:
+    def __init__(self, schedules: list[Schedule]):
+        self.by_day = defaultdict(list)
+        self.by_group = defaultdict(list)
+        self.by_teacher = defaultdict(list)
+        for schedule in sorted(schedules, key=_sort_key):
+            day_key = (schedule.is_even_week, schedule.day_of_week)
+            self.by_day[day_key].append(schedule)
+            self.by_group[(schedule.group_id, *day_key)].append(schedule)
+            for teacher_name in split_teacher_names(schedule.teacher):
+                self.by_teacher[
+                    (normalize_teacher_name(teacher_name), *day_key)
+                ].append(schedule)
+
+    def get_day_schedules(
+            self,
+            weekday: int,
+            even_week: bool,
+            lesson_number: int = None,
+    ) -> list[Schedule]:
+        return [
+            schedule for schedule in self.by_day[(even_week, weekday)]
+            if lesson_number is None or schedule.lesson_number == lesson_number
+        ]
+
+    def get_schedules(
+            self,
+            user: User,
+            weekday: int,
+            even_week: bool,
+            lesson_number: int = None,
+    ) -> list[Schedule]:
+        if user.role == UserRole.TEACHER:
+            schedules = list(self.by_teacher.get(
+                (normalize_teacher_name(user.teacher_name), even_week, weekday),
+                [],
+            ))
+        else:
+            schedules = [
+                schedule
+                for schedule in self.by_group[(user.group_id, even_week, weekday)]
+                if schedule.subgroup is None or schedule.subgroup == user.subgroup
+            ]
+        if lesson_number is not None:
+            schedules = [
+                schedule for schedule in schedules
+                if schedule.lesson_number == lesson_number
+            ]
+        return schedules
+
+
+schedule_index = ScheduleIndex([])
+
+
+def load_schedule_index() -> None:
+    global schedule_index
+
+    started = time.perf_counter()
+    with Session() as index_session:
+        schedules = index_session.execute(
+            select(Schedule).options(
+                selectinload(Schedule.group),
+            ).filter_by(
+                version_id=get_active_version_id(),
+            ),
+        ).scalars().all()
+    schedule_index = ScheduleIndex(schedules)
+    logger.info(
+        f"Индекс расписаний загружен: {len(schedules)} записей "
+        f"за {time.perf_counter() - started:.3f} с",
+    )
+
+
+def get_schedule_index() -> ScheduleIndex:
+    return schedule_index
+
+
+__all__ = [
+    "get_schedule_index",
+    "load_schedule_index",
+    "ScheduleIndex",
+]
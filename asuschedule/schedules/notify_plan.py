@@ -0,0 +1,122 @@
+import asyncio
+import datetime
+import logging
+from collections import defaultdict
+
+from sqlalchemy import select
+
+from consts import TIMEZONE
+from database import count_context_queries, session
+from models import User
+from schedules.broadcast import DaySchedules, get_day_schedules, get_recipient_key
+from schedules.schedules_text import get_next_lesson_text
+from users import get_user, on_reachability_change
+from utils import is_even_week
+
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationPlan:
+    def __init__(self):
+        self.date = None
+        self.day_schedules = None
+        self.slots = defaultdict(dict)
+        self.lock = asyncio.Lock()
+        self.pending_updates = None
+
+    async def build(self, date: datetime.datetime) -> None:
+        async with self.lock:
+            self.pending_updates = {}
+            try:
+                await self._build(date)
+            finally:
+                self.pending_updates = None
+
+    async def _build(self, date: datetime.datetime) -> None:
+        with count_context_queries() as queries:
+            users = (await session.execute(
+                select(User).filter_by(daily_notify=True, unreachable_since=None),
+            )).scalars().all()
+            day_schedules = DaySchedules(
+                await get_day_schedules(date.weekday(), is_even_week(date)),
+            )
+
+        self.date = date.date()
+        self.day_schedules = day_schedules
+        self.slots = defaultdict(dict)
+        rendered = {}
+        for user in users:
+            self._add_user(user, rendered)
+        for user_id, user in self.pending_updates.items():
+            if user is None:
+                self._remove_user(user_id)
+            else:
+                self._update_user(user)
+        logger.info(
+            f"План уведомлений на {self.date} построен: "
+            f"пользователей {len(users)}, запросов к БД {queries.count}, "
+            f"отрисовок {len(rendered)}",
+        )
+
+    async def rebuild(self) -> None:
+        await self.build(datetime.datetime.now(tz=TIMEZONE))
+
+    def _add_user(self, user: User, rendered: dict) -> None:
+        recipient_key = get_recipient_key(user)
+        for schedule in self.day_schedules.for_user(user):
+            slot = self.slots[schedule.lesson_number]
+            if user.id in slot:
+                continue
+            key = (recipient_key, schedule.lesson_number)
+            if key not in rendered:
+                rendered[key] = get_next_lesson_text(user, schedule)
+            slot[user.id] = rendered[key]
+
+    def _remove_user(self, user_id: int) -> None:
+        for slot in self.slots.values():
+            slot.pop(user_id, None)
+
+    def _update_user(self, user: User) -> None:
+        self._remove_user(user.id)
+        if user.daily_notify and user.unreachable_since is None:
+            self._add_user(user, {})
+
+    def remove_user(self, user_id: int) -> None:
+        if self.pending_updates is not None:
+            self.pending_updates[user_id] = None
+        self._remove_user(user_id)
+
+    def update_user(self, user: User) -> None:
+        if self.pending_updates is not None:
+            self.pending_updates[user.id] = user
+        if self.date is not None:
+            self._update_user(user)
+
+    async def get_messages(
+            self,
+            lesson_number: int,
+            date: datetime.datetime,
+    ) -> list[tuple[int, str]]:
+        if self.date != date.date():
+            await self.build(date)
+        return list(self.slots.get(lesson_number, {}).items())
+
+
+notification_plan = NotificationPlan()
+
+
+@on_reachability_change
+async def _update_reachability(user_id: int, reachable: bool) -> None:
+    if not reachable:
+        notification_plan.remove_user(user_id)
+        return
+    user = await get_user(user_id)
+    if user is not None:
+        notification_plan.update_user(user)
+
+
+__all__ = [
+    "NotificationPlan",
+    "notification_plan",
+]
@@ -0,0 +1,21 @@
+import asyncio
+
+from config import USE_SCHEDULE_INDEX
+from schedules.catalog import load_group_catalog, load_teacher_catalog
+from schedules.index import load_schedule_index
+from schedules.notify_plan import notification_plan
+from schedules.schedules_text import schedule_text_cache
+
+
+async def refresh_schedule_views() -> None:
+    if USE_SCHEDULE_INDEX:
+        await asyncio.to_thread(load_schedule_index)
+    await asyncio.to_thread(load_group_catalog)
+    await asyncio.to_thread(load_teacher_catalog)
+    schedule_text_cache.clear()
+    await notification_plan.rebuild()
+
+
+__all__ = [
+    "refresh_schedule_views",
+]
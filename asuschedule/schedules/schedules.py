@@ -1,23 +1,31 @@
 from sqlalchemy import or_, select
+from sqlalchemy.orm import joinedload
 
+from config import USE_SCHEDULE_INDEX
 from database import session
 from enums import UserRole
-from models import Schedule, User
+from models import Schedule, Teacher, User
+from schedules.index import get_schedule_index
+from schedules.versions import get_active_version_id
+from utils import normalize_teacher_name
 
 
-def get_schedules(
+async def query_schedules(
         user: User,
         weekday: int,
         even_week: bool,
         lesson_number: int = None,
 ) -> list[Schedule]:
     stmt = select(Schedule).filter_by(
+        version_id=get_active_version_id(),
         is_even_week=even_week,
         day_of_week=weekday,
     )
     if user.role == UserRole.TEACHER:
-        stmt = stmt.where(
-            Schedule.teacher.ilike(f"%{user.teacher_name}%"),
+        stmt = stmt.join(Schedule.teachers).options(
+            joinedload(Schedule.group),
+        ).where(
+            Teacher.normalized_name == normalize_teacher_name(user.teacher_name),
         )
     else:
         stmt = stmt.filter_by(group_id=user.group_id).where(
@@ -28,10 +36,24 @@ def get_schedules(
         )
     if lesson_number is not None:
         stmt = stmt.filter_by(lesson_number=lesson_number)
-    stmt = stmt.order_by(Schedule.lesson_number)
-    return session.execute(stmt).scalars().all()
+    stmt = stmt.order_by(Schedule.lesson_number, Schedule.id)
+    return (await session.execute(stmt)).scalars().all()
+
+
+async def get_schedules(
+        user: User,
+        weekday: int,
+        even_week: bool,
+        lesson_number: int = None,
+) -> list[Schedule]:
+    if USE_SCHEDULE_INDEX:
+        return get_schedule_index().get_schedules(
+            user, weekday, even_week, lesson_number,
+        )
+    return await query_schedules(user, weekday, even_week, lesson_number)
 
 
 __all__ = [
     "get_schedules",
+    "query_schedules",
 ]
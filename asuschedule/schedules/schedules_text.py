@@ -1,9 +1,19 @@
 import datetime
 
+from cache import LRUCache
+from config import SCHEDULE_TEXT_CACHE_SIZE, SCHEDULE_TEXT_CACHE_TTL
 from consts import DAY_NAMES, WEEK_NAMES
+from enums import UserRole
 from models import Schedule, User
+from schedules.schedules import get_schedules
+from schedules.versions import get_active_version_id
 from utils import is_even_week
 
+schedule_text_cache = LRUCache(
+    SCHEDULE_TEXT_CACHE_SIZE,
+    ttl=SCHEDULE_TEXT_CACHE_TTL,
+)
+
 
 def _build_schedule_text(
         user: User,
@@ -11,12 +21,12 @@ def _build_schedule_text(
         day_name: str,
         week_name: str,
 ) -> str:
-    schedule_text = f"<b>🗓️ Расписание на {day_name} ({week_name}):</b>\n\n"
+    parts = [f"<b>🗓️ Расписание на {day_name} ({week_name}):</b>\n\n"]
     if not schedules:
-        schedule_text += "🎉 Занятий нет."
+        parts.append("🎉 Занятий нет.")
     for schedule in schedules:
-        schedule_text += f"{schedule.to_text(user.role)}━━━━━━━━━━━━━━━━━━\n"
-    return schedule_text
+        parts.append(f"{schedule.to_text(user.role)}━━━━━━━━━━━━━━━━━━\n")
+    return "".join(parts)
 
 
 def get_next_lesson_text(user: User, schedule: Schedule) -> str:
@@ -44,8 +54,29 @@ def get_schedule_text_by_day(
     return _build_schedule_text(user, schedules, day_name, week_name)
 
 
+def _get_cache_key(user: User, day: int, even_week: bool) -> tuple:
+    if user.role == UserRole.TEACHER:
+        return user.role, user.teacher_name, day, even_week
+    return user.role, user.group_id, user.subgroup, day, even_week
+
+
+async def get_cached_schedule_text(user: User, day: int, even_week: bool) -> str:
+    key = _get_cache_key(user, day, even_week)
+    schedule_text = schedule_text_cache.get(key)
+    if schedule_text is None:
+        generation = schedule_text_cache.generation
+        version_id = get_active_version_id()
+        schedules = await get_schedules(user, day, even_week)
+        schedule_text = get_schedule_text_by_day(user, schedules, day, even_week)
+        if get_active_version_id() == version_id:
+            schedule_text_cache.set(key, schedule_text, generation)
+    return schedule_text
+
+
 __all__ = [
+    "get_cached_schedule_text",
     "get_next_lesson_text",
     "get_schedule_text",
     "get_schedule_text_by_day",
+    "schedule_text_cache",
 ]
@@ -0,0 +1,57 @@
+import logging
+
+from sqlalchemy import delete, exists, select
+from sqlalchemy.orm import Session
+
+from database import Session as SessionFactory
+from models import Schedule, schedule_teachers, Teacher
+from utils import normalize_teacher_name, split_teacher_names
+
+
+logger = logging.getLogger(__name__)
+
+
+class TeacherResolver:
+    def __init__(self, db_session: Session):
+        self.session = db_session
+        self.teachers = {
+            teacher.normalized_name: teacher
+            for teacher in db_session.execute(select(Teacher)).scalars()
+        }
+
+    def resolve(self, teacher: str | None) -> list[Teacher]:
+        teachers = []
+        for name in split_teacher_names(teacher):
+            normalized_name = normalize_teacher_name(name)
+            if normalized_name not in self.teachers:
+                self.teachers[normalized_name] = Teacher(
+                    name=name,
+                    normalized_name=normalized_name,
+                )
+                self.session.add(self.teachers[normalized_name])
+            teachers.append(self.teachers[normalized_name])
+        return teachers
+
+
+def rebuild_teacher_links(db_session: Session) -> None:
+    db_session.execute(delete(schedule_teachers))
+    resolver = TeacherResolver(db_session)
+    for schedule in db_session.execute(select(Schedule)).scalars():
+        schedule.teachers = resolver.resolve(schedule.teacher)
+    db_session.commit()
+    logger.info(f"Связи занятий с преподавателями перестроены: {len(resolver.teachers)}")
+
+
+def sync_teacher_links() -> None:
+    with SessionFactory() as db_session:
+        has_links = db_session.execute(select(exists(schedule_teachers))).scalar()
+        has_schedules = db_session.execute(select(exists(Schedule))).scalar()
+        if has_schedules and not has_links:
+            rebuild_teacher_links(db_session)
+
+
+__all__ = [
+    "rebuild_teacher_links",
+    "sync_teacher_links",
+    "TeacherResolver",
+]
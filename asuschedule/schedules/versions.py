@@ -0,0 +1,128 @@
+import asyncio
+import datetime
+import logging
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from consts import TIMEZONE
+from database import Session as SessionFactory
+from models import Schedule, schedule_teachers, ScheduleVersion
+
+
+logger = logging.getLogger(__name__)
+
+_active_version_id = None
+_active_version_loaded = False
+
+import_lock = asyncio.Lock()
+
+
+def _load_active_version_id(db_session: Session) -> int | None:
+    return db_session.execute(
+        select(ScheduleVersion.id).filter_by(is_active=True),
+    ).scalar_one_or_none()
+
+
+def _set_active_version_id(version_id: int | None) -> None:
+    global _active_version_id, _active_version_loaded
+
+    _active_version_id = version_id
+    _active_version_loaded = True
+
+
+def get_active_version_id() -> int | None:
+    if not _active_version_loaded:
+        with SessionFactory() as version_session:
+            _set_active_version_id(_load_active_version_id(version_session))
+    return _active_version_id
+
+
+def create_version(db_session: Session) -> ScheduleVersion:
+    version = ScheduleVersion(created_at=datetime.datetime.now(tz=TIMEZONE))
+    db_session.add(version)
+    db_session.commit()
+    return version
+
+
+def delete_version_rows(db_session: Session, version_ids: list[int]) -> None:
+    schedule_ids = select(Schedule.id).where(Schedule.version_id.in_(version_ids))
+    db_session.execute(
+        delete(schedule_teachers).where(
+            schedule_teachers.c.schedule_id.in_(schedule_ids),
+        ),
+    )
+    db_session.execute(delete(Schedule).where(Schedule.version_id.in_(version_ids)))
+
+
+def discard_version(db_session: Session, version_id: int) -> None:
+    db_session.rollback()
+    delete_version_rows(db_session, [version_id])
+    db_session.execute(delete(ScheduleVersion).filter_by(id=version_id))
+    db_session.commit()
+
+
+def _activate(db_session: Session, version_id: int) -> None:
+    db_session.execute(
+        update(ScheduleVersion).filter_by(is_active=True).values(is_active=False),
+    )
+    db_session.execute(
+        update(ScheduleVersion).filter_by(id=version_id).values(
+            is_active=True,
+            published_at=func.coalesce(
+                ScheduleVersion.published_at,
+                datetime.datetime.now(tz=TIMEZONE),
+            ),
+        ),
+    )
+    db_session.commit()
+    _set_active_version_id(version_id)
+
+
+def publish_version(db_session: Session, version_id: int) -> None:
+    previous_version_id = _load_active_version_id(db_session)
+    keep = {version_id, previous_version_id} - {None}
+    stale_version_ids = db_session.execute(
+        select(ScheduleVersion.id).where(ScheduleVersion.id.notin_(keep)),
+    ).scalars().all()
+    if stale_version_ids:
+        delete_version_rows(db_session, stale_version_ids)
+        db_session.execute(
+            delete(ScheduleVersion).where(ScheduleVersion.id.in_(stale_version_ids)),
+        )
+    _activate(db_session, version_id)
+    logger.info(
+        f"Опубликована версия расписания {version_id} "
+        f"(предыдущая: {previous_version_id})",
+    )
+
+
+def rollback_version(db_session: Session) -> int | None:
+    active_version_id = _load_active_version_id(db_session)
+    if active_version_id is None:
+        return None
+    previous_version_id = db_session.execute(
+        select(ScheduleVersion.id).where(
+            ScheduleVersion.id < active_version_id,
+            ScheduleVersion.published_at.isnot(None),
+        ).order_by(ScheduleVersion.id.desc()).limit(1),
+    ).scalar_one_or_none()
+    if previous_version_id is None:
+        return None
+    _activate(db_session, previous_version_id)
+    logger.info(
+        f"Расписание откачено к версии {previous_version_id} "
+        f"(была активна {active_version_id})",
+    )
+    return previous_version_id
+
+
+__all__ = [
+    "create_version",
+    "delete_version_rows",
+    "discard_version",
+    "get_active_version_id",
+    "import_lock",
+    "publish_version",
+    "rollback_version",
+]
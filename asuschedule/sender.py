@@ -0,0 +1,219 @@
+import asyncio
+import datetime
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+
+from telegram import Bot
+from telegram.error import (
+    BadRequest,
+    Forbidden,
+    NetworkError,
+    RetryAfter,
+    TelegramError,
+)
+
+from config import BROADCAST_CONCURRENCY
+from consts import TELEGRAM_CHAT_RATE, TELEGRAM_GLOBAL_RATE
+from metrics import messages_sent, send_errors, send_retries
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.updated) * self.rate,
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@dataclass
+class SendReport:
+    total: int
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    started: float = field(default_factory=time.monotonic)
+    finished: float = None
+
+    @property
+    def done(self) -> int:
+        return self.sent + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def rate(self) -> float:
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+    def to_text(self) -> str:
+        return (
+            f"отправлено {self.sent} из {self.total}, "
+            f"ошибок {self.failed}, повторов {self.retries}, "
+            f"{self.elapsed:.1f} с ({self.rate:.1f} сообщ./с)"
+        )
+
+
+ProgressCallback = Callable[[SendReport], Awaitable[None]]
+ResultCallback = Callable[[int, TelegramError | None], Awaitable[None]]
+
+
+class SendPipeline:
+    def __init__(
+            self,
+            concurrency: int,
+            global_rate: float = TELEGRAM_GLOBAL_RATE,
+            chat_rate: float = TELEGRAM_CHAT_RATE,
+            max_retries: int = 3,
+    ):
+        self.concurrency = concurrency
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_interval = 1 / chat_rate
+        self.chat_last_sent = {}
+        self.max_retries = max_retries
+        self.paused_until = 0.0
+
+    async def _throttle(self, chat_id: int) -> None:
+        while (delay := self.paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+        chat_delay = (
+            self.chat_last_sent.get(chat_id, 0.0)
+            + self.chat_interval
+            - time.monotonic()
+        )
+        if chat_delay > 0:
+            await asyncio.sleep(chat_delay)
+        await self.global_bucket.acquire()
+        self.chat_last_sent[chat_id] = time.monotonic()
+
+    def _prune_chats(self) -> None:
+        threshold = time.monotonic() - self.chat_interval
+        self.chat_last_sent = {
+            chat_id: sent_at for chat_id, sent_at in self.chat_last_sent.items()
+            if sent_at > threshold
+        }
+
+    async def _send_one(
+            self,
+            bot: Bot,
+            chat_id: int,
+            text: str,
+            parse_mode: str,
+            report: SendReport,
+    ) -> TelegramError | None:
+        error = None
+        for attempt in range(self.max_retries + 1):
+            await self._throttle(chat_id)
+            try:
+                await bot.send_message(
+                    chat_id=chat_id,
+                    text=text,
+                    parse_mode=parse_mode,
+                )
+                report.sent += 1
+                messages_sent.inc()
+                return None
+            except RetryAfter as e:
+                error = e
+                retry_after = e.retry_after
+                if isinstance(retry_after, datetime.timedelta):
+                    retry_after = retry_after.total_seconds()
+                self.paused_until = max(
+                    self.paused_until,
+                    time.monotonic() + retry_after,
+                )
+                send_errors.inc(error="RetryAfter")
+                logger.warning(f"Flood control, pausing sends for {retry_after} s")
+            except (BadRequest, Forbidden) as e:
+                error = e
+                send_errors.inc(error=type(e).__name__)
+                logger.info(f"Failed to send message to {chat_id}: {e}")
+                break
+            except NetworkError as e:
+                error = e
+                send_errors.inc(error=type(e).__name__)
+                logger.warning(f"Network error while sending to {chat_id}: {e}")
+                if attempt < self.max_retries:
+                    await asyncio.sleep(2 ** attempt)
+            except TelegramError as e:
+                error = e
+                send_errors.inc(error=type(e).__name__)
+                logger.info(f"Failed to send message to {chat_id}: {e}")
+                break
+            if attempt < self.max_retries:
+                report.retries += 1
+                send_retries.inc()
+        report.failed += 1
+        return error
+
+    async def send(
+            self,
+            bot: Bot,
+            messages: Iterable[tuple[int, str]],
+            parse_mode: str = None,
+            on_progress: ProgressCallback = None,
+            progress_interval: float = 5.0,
+            on_result: ResultCallback = None,
+    ) -> SendReport:
+        messages = list(messages)
+        report = SendReport(total=len(messages))
+        pending = enumerate(messages)
+
+        async def worker() -> None:
+            for index, (chat_id, text) in pending:
+                error = await self._send_one(bot, chat_id, text, parse_mode, report)
+                if on_result:
+                    await on_result(index, error)
+
+        async def monitor() -> None:
+            while True:
+                await asyncio.sleep(progress_interval)
+                await on_progress(report)
+
+        monitor_task = asyncio.create_task(monitor()) if on_progress else None
+        try:
+            await asyncio.gather(
+                *(worker() for _ in range(min(self.concurrency, len(messages)))),
+            )
+        finally:
+            if monitor_task:
+                monitor_task.cancel()
+            report.finished = time.monotonic()
+            self._prune_chats()
+        if on_progress:
+            await on_progress(report)
+        return report
+
+
+send_pipeline = SendPipeline(BROADCAST_CONCURRENCY)
+
+
+__all__ = [
+    "ProgressCallback",
+    "ResultCallback",
+    "SendPipeline",
+    "SendReport",
+    "send_pipeline",
+    "TokenBucket",
+]
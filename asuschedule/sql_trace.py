@@ -0,0 +1,139 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from sqlalchemy import Engine, event
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from config import SQL_TRACE, SQL_TRACE_MAX_QUERIES, SQL_TRACE_MAX_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+SQL_TRACE_STATEMENT_LENGTH = 300
+
+current_trace = ContextVar("current_trace", default=None)
+
+
+class SqlTrace:
+    def __init__(self, label: str):
+        self.label = label
+        self.started = time.perf_counter()
+        self.statements = {}
+        self.queries = 0
+        self.query_time = 0.0
+
+    def record(self, statement: str, duration: float) -> None:
+        count, total = self.statements.get(statement, (0, 0.0))
+        self.statements[statement] = (count + 1, total + duration)
+        self.queries += 1
+        self.query_time += duration
+
+    def to_text(self, duration: float) -> str:
+        lines = [
+            f"{self.label}: {duration * 1e3:.1f} мс, "
+            f"запросов {self.queries} ({self.query_time * 1e3:.1f} мс в БД)",
+        ]
+        statements = sorted(
+            self.statements.items(),
+            key=lambda item: item[1][1],
+            reverse=True,
+        )
+        for statement, (count, total) in statements:
+            statement = " ".join(statement.split())[:SQL_TRACE_STATEMENT_LENGTH]
+            lines.append(f"    {count} × {total * 1e3:.1f} мс: {statement}")
+        return "\n".join(lines)
+
+
+class SqlTracer:
+    def __init__(self, enabled: bool, max_queries: int, max_seconds: float):
+        self.enabled = enabled
+        self.max_queries = max_queries
+        self.max_seconds = max_seconds
+
+    @contextmanager
+    def trace(self, label: str):
+        if not self.enabled:
+            yield None
+            return
+        trace = SqlTrace(label)
+        token = current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            current_trace.reset(token)
+            duration = time.perf_counter() - trace.started
+            if trace.queries > self.max_queries or duration > self.max_seconds:
+                logger.warning(f"Медленное обновление {trace.to_text(duration)}")
+
+    def to_text(self) -> str:
+        return (
+            f"Трассировка SQL {'включена' if self.enabled else 'выключена'}. "
+            f"Пороги: {self.max_queries} запросов, {self.max_seconds} с."
+        )
+
+
+sql_tracer = SqlTracer(SQL_TRACE, SQL_TRACE_MAX_QUERIES, SQL_TRACE_MAX_SECONDS)
+
+
+def _before_cursor_execute(conn, _cursor, statement, parameters, *_args):
+    trace = current_trace.get()
+    if trace is None:
+        return statement, parameters
+    conn.info.setdefault("trace_started", []).append(time.perf_counter())
+    return f"{statement} /* {trace.label} */", parameters
+
+
+def _after_cursor_execute(conn, _cursor, statement, *_args) -> None:
+    if not conn.info.get("trace_started"):
+        return
+    started = conn.info["trace_started"].pop()
+    trace = current_trace.get()
+    if trace is None:
+        return
+    trace.record(
+        statement.removesuffix(f" /* {trace.label} */"),
+        time.perf_counter() - started,
+    )
+
+
+def _handle_error(context) -> None:
+    if context.connection is not None and context.connection.info.get("trace_started"):
+        context.connection.info["trace_started"].pop()
+
+
+def install_sql_trace(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute, retval=True)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def get_update_label(update: object) -> str:
+    if not isinstance(update, Update):
+        return type(update).__name__
+    label = f"update {update.update_id}"
+    if update.effective_user:
+        label += f" user {update.effective_user.id}"
+    return label
+
+
+def trace_job(func):
+    @wraps(func)
+    async def wrapper(context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
+        with sql_tracer.trace(f"job {context.job.name}"):
+            return await func(context, *args, **kwargs)
+    return wrapper
+
+
+__all__ = [
+    "current_trace",
+    "get_update_label",
+    "install_sql_trace",
+    "sql_tracer",
+    "SqlTrace",
+    "SqlTracer",
+    "trace_job",
+]
@@ -0,0 +1,127 @@
+import datetime
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import select, update
+from telegram.error import BadRequest, Forbidden, TelegramError
+
+from cache import LRUCache
+from config import USER_CACHE_SIZE, USER_CACHE_TTL
+from consts import TIMEZONE
+from database import AsyncSession
+from models import User
+from sender import ResultCallback
+
+
+UNREACHABLE_BAD_REQUESTS = ("chat not found", "peer_id_invalid")
+
+user_cache = LRUCache(USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+ReachabilityCallback = Callable[[int, bool], Awaitable[None]]
+reachability_callbacks: list[ReachabilityCallback] = []
+
+
+async def get_user(user_id: int) -> User | None:
+    user = user_cache.get(user_id)
+    if user is None:
+        async with AsyncSession() as user_session:
+            user = await user_session.get(User, user_id)
+        if user is not None:
+            user_cache.set(user_id, user)
+    return user
+
+
+def invalidate_user(user_id: int) -> None:
+    user_cache.pop(user_id)
+
+
+def on_reachability_change(callback: ReachabilityCallback) -> ReachabilityCallback:
+    reachability_callbacks.append(callback)
+    return callback
+
+
+async def _notify_reachability(user_id: int, reachable: bool) -> None:
+    invalidate_user(user_id)
+    for callback in reachability_callbacks:
+        await callback(user_id, reachable)
+
+
+def is_unreachable(error: TelegramError) -> bool:
+    if isinstance(error, Forbidden):
+        return True
+    return isinstance(error, BadRequest) and any(
+        message in error.message.lower() for message in UNREACHABLE_BAD_REQUESTS
+    )
+
+
+def collect_unreachable(
+        messages: list[tuple[int, str]],
+        send_errors: dict[int, str],
+) -> ResultCallback:
+    async def on_result(index: int, error: TelegramError | None) -> None:
+        if error is not None and is_unreachable(error):
+            send_errors[messages[index][0]] = error.message
+    return on_result
+
+
+async def mark_unreachable(send_errors: dict[int, str]) -> int:
+    if not send_errors:
+        return 0
+    now = datetime.datetime.now(tz=TIMEZONE)
+    user_ids = defaultdict(list)
+    for user_id, error in send_errors.items():
+        user_ids[error].append(user_id)
+    pruned = 0
+    async with AsyncSession.begin() as db_session:
+        for error, ids in user_ids.items():
+            result = await db_session.execute(
+                update(User).where(
+                    User.id.in_(ids),
+                    User.unreachable_since.is_(None),
+                ).values(
+                    unreachable_since=now,
+                    send_error=error,
+                ),
+            )
+            pruned += result.rowcount
+    for user_id in send_errors:
+        await _notify_reachability(user_id, False)
+    return pruned
+
+
+async def sync_unreachable(since: datetime.datetime) -> datetime.datetime:
+    async with AsyncSession() as db_session:
+        rows = (await db_session.execute(
+            select(User.id, User.unreachable_since).where(
+                User.unreachable_since > since,
+            ),
+        )).all()
+    for user_id, unreachable_since in rows:
+        await _notify_reachability(user_id, False)
+        since = max(since, unreachable_since)
+    return since
+
+
+async def mark_reachable(user_id: int) -> None:
+    async with AsyncSession.begin() as db_session:
+        await db_session.execute(
+            update(User).filter_by(id=user_id).values(
+                unreachable_since=None,
+                send_error=None,
+            ),
+        )
+    await _notify_reachability(user_id, True)
+
+
+__all__ = [
+    "collect_unreachable",
+    "get_user",
+    "invalidate_user",
+    "is_unreachable",
+    "mark_reachable",
+    "mark_unreachable",
+    "on_reachability_change",
+    "ReachabilityCallback",
+    "sync_unreachable",
+    "user_cache",
+]
@@ -1,21 +1,28 @@
+import asyncio
+import weakref
+from contextlib import nullcontext
 from functools import wraps
 
 from telegram import ReplyKeyboardMarkup, Update
-from telegram.ext import ContextTypes
+from telegram.ext import BaseUpdateProcessor, ContextTypes
 
 from config import INVERT_WEEK_PARITY
 from database import session
 from enums import UserRole, UserStatus
-from models import User
+from sql_trace import get_update_label, sql_tracer
+from users import get_user, mark_reachable
+
+
+MAIN_KEYBOARD = [
+    ["Расписание на сегодня", "Расписание на завтра"],
+    ["Выбрать день", "Информация"],
+    ["Ежедневная рассылка", "Изменить группу"],
+]
 
 
 def get_main_keyboard():
     return ReplyKeyboardMarkup(
-        [
-            ["Расписание на сегодня", "Расписание на завтра"],
-            ["Выбрать день", "Информация"],
-            ["Ежедневная рассылка", "Изменить группу"],
-        ],
+        MAIN_KEYBOARD,
         resize_keyboard=True,
         one_time_keyboard=False,
     )
@@ -26,14 +33,16 @@ def require_registration(func):
     async def wrapper(
             update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs,
     ):
-        user = session.get(User, update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if user is None or (not user.role == UserRole.TEACHER and user.group_id is None):
             await update.message.reply_text(
                 "Вы не зарегистрированы или не завершили настройку. "
                 "Пожалуйста, начните с команды /start.",
             )
             return None
-        return await func(update, context, *args, **kwargs)
+        if user.unreachable_since is not None:
+            await mark_reachable(user.id)
+        return await func(update, context, *args, user=user, **kwargs)
     return wrapper
 
 
@@ -42,7 +51,7 @@ def require_staff(func):
     async def wrapper(
             update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs,
     ):
-        user = session.get(User, update.effective_user.id)
+        user = await get_user(update.effective_user.id)
         if user is None or not user.status == UserStatus.ADMIN:
             await update.message.reply_text(
                 "⛔ У вас нет доступа к этой команде.",
@@ -52,6 +61,37 @@ def require_staff(func):
     return wrapper
 
 
+class SessionUpdateProcessor(BaseUpdateProcessor):
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._conversation_locks = weakref.WeakValueDictionary()
+
+    def _get_conversation_lock(self, update: object) -> asyncio.Lock | None:
+        if not isinstance(update, Update):
+            return None
+        key = (
+            update.effective_chat.id if update.effective_chat else None,
+            update.effective_user.id if update.effective_user else None,
+        )
+        if key == (None, None):
+            return None
+        return self._conversation_locks.setdefault(key, asyncio.Lock())
+
+    async def do_process_update(self, update: object, coroutine) -> None:
+        try:
+            async with self._get_conversation_lock(update) or nullcontext():
+                with sql_tracer.trace(get_update_label(update)):
+                    await coroutine
+        finally:
+            await session.remove()
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+
 def is_even_week(date) -> bool:
     week_number = date.isocalendar()[1]
     if INVERT_WEEK_PARITY:
@@ -59,9 +99,50 @@ def is_even_week(date) -> bool:
     return week_number % 2 == 0
 
 
+def normalize_teacher_name(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+def split_teacher_names(teacher: str | None) -> list[str]:
+    if not teacher:
+        return []
+    names = {}
+    for name in teacher.split("/"):
+        name = " ".join(name.split())
+        if name:
+            names.setdefault(normalize_teacher_name(name), name)
+    return list(names.values())
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.max_lag = 0.0
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.max_lag = max(self.max_lag, loop.time() - started - self.interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+
 __all__ = [
     "get_main_keyboard",
     "is_even_week",
+    "LoopLagMonitor",
+    "MAIN_KEYBOARD",
+    "normalize_teacher_name",
     "require_registration",
     "require_staff",
+    "SessionUpdateProcessor",
+    "split_teacher_names",
 ]
@@ -0,0 +1,132 @@
+import asyncio
+import hmac
+import json
+import logging
+import secrets
+import signal
+
+from telegram import Update
+from telegram.ext import Application
+
+from config import (
+    WEBHOOK_HOST,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET_TOKEN,
+    WEBHOOK_URL,
+)
+from http_server import HttpError, read_request, write_response
+
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_MAX_BODY = 1024 * 1024
+SECRET_TOKEN_HEADER = "x-telegram-bot-api-secret-token"
+
+
+class WebhookServer:
+    def __init__(self, application: Application, path: str, secret_token: str):
+        self.application = application
+        self.path = path
+        self.secret_token = secret_token
+
+    def is_ready(self) -> bool:
+        return self.application.running and not self.application.update_queue.full()
+
+    async def _handle_update(self, body: bytes, headers: dict[str, str]) -> str:
+        if not hmac.compare_digest(
+            headers.get(SECRET_TOKEN_HEADER, "").encode("utf-8"),
+            self.secret_token.encode("utf-8"),
+        ):
+            logger.warning("Webhook: запрос с неверным секретным токеном")
+            return "403 Forbidden"
+        try:
+            update = Update.de_json(json.loads(body), self.application.bot)
+        except (ValueError, TypeError, KeyError):
+            logger.warning("Webhook: некорректное тело запроса")
+            return "400 Bad Request"
+        try:
+            self.application.update_queue.put_nowait(update)
+        except asyncio.QueueFull:
+            logger.warning(
+                f"Webhook: очередь обновлений заполнена, "
+                f"обновление {update.update_id} отклонено",
+            )
+            return "503 Service Unavailable"
+        return "200 OK"
+
+    async def handle(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+    ) -> None:
+        try:
+            request = await read_request(reader, WEBHOOK_MAX_BODY)
+            if request.method == "POST" and request.path == self.path:
+                status = await self._handle_update(request.body, request.headers)
+            elif request.method == "GET" and request.path == "/healthz":
+                status = "200 OK"
+            elif request.method == "GET" and request.path == "/readyz":
+                status = "200 OK" if self.is_ready() else "503 Service Unavailable"
+            else:
+                status = "404 Not Found"
+            await write_response(writer, status, f"{status}\n".encode("latin-1"))
+        except HttpError as e:
+            await write_response(writer, e.status)
+        finally:
+            writer.close()
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        logger.info(f"Webhook принимает обновления на http://{host}:{port}{self.path}")
+        return await asyncio.start_server(self.handle, host, port)
+
+
+def _get_secret_token() -> str:
+    if WEBHOOK_SECRET_TOKEN:
+        return WEBHOOK_SECRET_TOKEN
+    logger.warning(
+        "WEBHOOK_SECRET_TOKEN не задан, используется случайный токен: "
+        "локальная отправка обновлений будет недоступна",
+    )
+    return secrets.token_urlsafe(32)
+
+
+async def run_webhook(application: Application) -> None:
+    secret_token = _get_secret_token()
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    async with application:
+        if application.post_init:
+            await application.post_init(application)
+        if WEBHOOK_URL:
+            await application.bot.set_webhook(
+                url=WEBHOOK_URL,
+                secret_token=secret_token,
+                allowed_updates=Update.ALL_TYPES,
+            )
+        else:
+            logger.warning("WEBHOOK_URL не задан, webhook в Telegram не регистрируется")
+
+        server = await WebhookServer(application, WEBHOOK_PATH, secret_token).start(
+            WEBHOOK_HOST, WEBHOOK_PORT,
+        )
+        await application.start()
+        try:
+            await stop_event.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            await application.stop()
+            if application.post_stop:
+                await application.post_stop(application)
+    if application.post_shutdown:
+        await application.post_shutdown(application)
+
+
+__all__ = [
+    "run_webhook",
+    "WebhookServer",
+]
@@ -0,0 +1,52 @@
+import asyncio
+import datetime
+import logging
+import signal
+from pathlib import Path
+
+from telegram import Bot
+
+from config import BOT_TOKEN, BROADCAST_CONCURRENCY, WORKER_SHARD, WORKER_SHARDS
+from consts import TELEGRAM_GLOBAL_RATE, TIMEZONE
+from outbox import OutboxWorker
+from sender import SendPipeline
+
+__all__ = []
+
+Path("logs").mkdir(exist_ok=True)
+logging.basicConfig(
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    level=logging.INFO,
+    handlers=[
+        logging.FileHandler(
+            datetime.datetime.now(tz=TIMEZONE).strftime(
+                f"logs/worker-{WORKER_SHARD}_%Y-%m-%d_%H-%M-%S.log",
+            ),
+            encoding="utf-8",
+        ),
+        logging.StreamHandler(),
+    ],
+)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+async def run() -> None:
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    pipeline = SendPipeline(
+        BROADCAST_CONCURRENCY,
+        global_rate=TELEGRAM_GLOBAL_RATE / WORKER_SHARDS,
+    )
+    async with Bot(BOT_TOKEN) as bot:
+        await OutboxWorker(bot, WORKER_SHARD, WORKER_SHARDS, pipeline).run(stop_event)
+
+
+def main() -> None:
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()